@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""Benchmark CLI startup cost with python -X importtime"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+SCRIPT = "resize_screenshots.py"
+
+SCENARIOS = {
+    "import": [sys.executable, "-X", "importtime", "-c", "import resize_screenshots"],
+    "help": [sys.executable, "-X", "importtime", SCRIPT, "--help"],
+}
+
+
+def parse_importtime(stderr):
+    """Return {module: (self_us, cumulative_us)} from -X importtime output."""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def run_scenario(cmd, runs):
+    # Bytecode caching matters for startup; make sure it is allowed
+    env = dict(os.environ)
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    subprocess.run(cmd, capture_output=True, env=env)  # warm the bytecode cache
+    walls, totals, modules = [], [], {}
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = subprocess.run(cmd, capture_output=True, text=True, env=env)
+        walls.append(time.perf_counter() - start)
+        modules = parse_importtime(result.stderr)
+        totals.append(sum(self_us for self_us, _ in modules.values()))
+    top = sorted(modules.items(), key=lambda kv: kv[1][1], reverse=True)[:10]
+    return {
+        "wall_ms": round(statistics.median(walls) * 1000, 1),
+        "import_ms": round(statistics.median(totals) / 1000, 1),
+        "pil_imported": any(name == "PIL" or name.startswith("PIL.") for name in modules),
+        "top_cumulative_us": {name: cumulative for name, (_, cumulative) in top},
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--runs", type=int, default=10, help="Runs per scenario (default: 10)")
+    ap.add_argument("--json", metavar="PATH", help="Also write results as JSON")
+    args = ap.parse_args()
+
+    results = {}
+    for name, cmd in SCENARIOS.items():
+        res = run_scenario(cmd, args.runs)
+        results[name] = res
+        print(f"{name}: {res['wall_ms']} ms wall, {res['import_ms']} ms imports, PIL imported: {res['pil_imported']}")
+        for module, cumulative in res["top_cumulative_us"].items():
+            print(f"    {cumulative / 1000:7.1f} ms  {module}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    # Startup paths must not pay for Pillow
+    return 1 if any(res["pil_imported"] for res in results.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
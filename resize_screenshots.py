@@ -1,9 +1,17 @@
 #!/usr/bin/env python3
-import argparse, math, os, sys, subprocess, tempfile
+from __future__ import annotations
+
+import argparse, collections, fnmatch, io, marshal, math, os, queue, re, struct, sys, subprocess, threading, time, zlib
 from pathlib import Path
-from PIL import Image, ImageOps
+from typing import TYPE_CHECKING
 import json
 
+if TYPE_CHECKING:
+    from PIL import Image
+
+# Pillow, hashlib and concurrent.futures are imported inside the functions that
+# need them so --help, --validate on videos and other quick invocations start fast.
+
 # Status bar heights for each device (in points, will be scaled appropriately)
 STATUS_BAR_HEIGHTS = {
     "ipad": {
@@ -200,6 +208,103 @@ TARGETS = {
     },
 }
 
+TARGET_INDEX_VERSION = 2
+
+def _normalize_size_table(table, name):
+    """Validate a {family: {group: {orientation: [[w, h], ...]}}} table, returning tuples for sizes."""
+    if not isinstance(table, dict):
+        raise ValueError(f"{name} must be an object of families")
+    out = {}
+    for fam, groups in table.items():
+        if not isinstance(groups, dict):
+            raise ValueError(f"{name}.{fam} must be an object of groups")
+        out[fam] = {}
+        for group, orientations in groups.items():
+            if not isinstance(orientations, dict) or set(orientations) - {"portrait", "landscape"}:
+                raise ValueError(f"{name}.{fam}.{group} must map portrait/landscape to size lists")
+            out[fam][group] = {}
+            for orien, dims in orientations.items():
+                try:
+                    out[fam][group][orien] = [(int(w), int(h)) for (w, h) in dims]
+                except (TypeError, ValueError):
+                    raise ValueError(f"{name}.{fam}.{group}.{orien} must be a list of [width, height] pairs")
+    return out
+
+def _normalize_status_bar_heights(table, name):
+    """Validate a {family: {group: height}} table, returning int heights."""
+    if not isinstance(table, dict):
+        raise ValueError(f"{name} must be an object of families")
+    out = {}
+    for fam, groups in table.items():
+        if not isinstance(groups, dict):
+            raise ValueError(f"{name}.{fam} must be an object of groups")
+        try:
+            out[fam] = {group: int(h) for group, h in groups.items()}
+        except (TypeError, ValueError):
+            raise ValueError(f"{name}.{fam} must map groups to heights in pixels")
+    return out
+
+def _target_index_path(data_path):
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    key = re.sub(r"[^A-Za-z0-9._-]", "_", str(Path(data_path).resolve()).strip("/"))
+    return Path(cache_home) / "smartbar-resize" / f"{key}.idx"
+
+def load_target_tables(data_path):
+    """Load (TARGETS, VIDEO_TARGETS, STATUS_BAR_HEIGHTS) from a JSON data file.
+
+    The parsed and validated tables are compiled into a marshal index under the
+    user cache directory, keyed by the file's path, size and mtime, so repeated
+    single-file runs skip JSON parsing and validation.  Missing keys keep the
+    built-in table; only the tables the file provides are stored in the index,
+    so built-ins always come from the running script.
+    """
+    data_path = Path(data_path)
+    st = data_path.stat()
+    stamp = (TARGET_INDEX_VERSION, st.st_size, st.st_mtime_ns)
+    index_path = _target_index_path(data_path)
+    try:
+        with open(index_path, "rb") as f:
+            cached = marshal.load(f)
+        if cached[0] == stamp:
+            return _with_builtin_tables(cached[1])
+    except (OSError, EOFError, ValueError, TypeError, IndexError):
+        pass
+
+    try:
+        data = json.loads(data_path.read_text())
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Invalid targets file {data_path}: {e}")
+    if not isinstance(data, dict):
+        raise ValueError(f"Invalid targets file {data_path}: expected an object with targets/video_targets/status_bar_heights")
+    tables = tuple(
+        None if name not in data else normalize(data[name], name)
+        for name, normalize in (("targets", _normalize_size_table), ("video_targets", _normalize_size_table),
+                                ("status_bar_heights", _normalize_status_bar_heights))
+    )
+    try:
+        index_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = index_path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, "wb") as f:
+            marshal.dump((stamp, tables), f)
+        os.replace(tmp, index_path)
+    except OSError:
+        pass  # read-only cache dir: the JSON is simply parsed every run
+    return _with_builtin_tables(tables)
+
+def _with_builtin_tables(tables):
+    """Fill tables a data file does not provide (None) with the built-in ones."""
+    return tuple(builtin if table is None else table
+                 for table, builtin in zip(tables, (TARGETS, VIDEO_TARGETS, STATUS_BAR_HEIGHTS)))
+
+def dump_target_tables(data_path):
+    """Write the active tables as an editable JSON data file for --targets-file."""
+    data = {"targets": TARGETS, "video_targets": VIDEO_TARGETS, "status_bar_heights": STATUS_BAR_HEIGHTS}
+    Path(data_path).write_text(json.dumps(data, indent=2) + "\n")
+
+def use_target_tables(targets, video_targets, status_bar_heights):
+    global TARGETS, VIDEO_TARGETS, STATUS_BAR_HEIGHTS
+    TARGETS, VIDEO_TARGETS, STATUS_BAR_HEIGHTS = targets, video_targets, status_bar_heights
+
 def iter_family_groups(family, use_video_targets=False):
     targets = VIDEO_TARGETS if use_video_targets else TARGETS
     for group_label, orientations in targets.get(family, {}).items():
@@ -313,7 +418,8 @@ def closest_size_for_group(in_w, in_h, fam, group_label, orient, use_video_targe
         return None
     return closest_size_from_list(in_w, in_h, sizes)
 
-from typing import Tuple
+# Parsed command line options; main() replaces this with the real namespace
+args_namespace = argparse.Namespace()
 
 def get_status_bar_height(family: str, group: str, target_w: int, target_h: int) -> int:
     """Get the appropriate status bar height for a device family and group, scaled to target resolution."""
@@ -334,77 +440,237 @@ def get_status_bar_height(family: str, group: str, target_w: int, target_h: int)
     
     return max(1, int(round(base_height * scale_factor)))
 
-def two_slice_resize_horizontal(bar_img: Image.Image, left_cap: int, right_cap: int, target_w: int, target_h: int) -> Image.Image:
-    """Resize status bar by positioning left/right caps without stretching, filling middle with solid background."""
-    w, h = bar_img.size
-    
+# Resampling tiers, from highest quality to fastest.  "filter" names a PIL.Image
+# constant, "reducing_gap" is passed to Image.resize (a cheap box pre-reduction
+# before the final filter), "ffmpeg" is the equivalent swscale flag for videos and
+# "support" is the filter radius in pixels, used to overlap bands in banded rendering.
+RESAMPLE_TIERS = {
+    "lanczos":  {"filter": "LANCZOS",  "reducing_gap": None, "ffmpeg": "lanczos",  "support": 3.0},
+    "bicubic":  {"filter": "BICUBIC",  "reducing_gap": 2.0,  "ffmpeg": "bicubic",  "support": 2.0},
+    "bilinear": {"filter": "BILINEAR", "reducing_gap": None, "ffmpeg": "bilinear", "support": 1.0},
+}
+
+def resize_with_tier(img, size, resample="lanczos", box=None):
+    from PIL import Image
+    tier = RESAMPLE_TIERS[resample]
+    return img.resize(size, getattr(Image, tier["filter"]), box=box, reducing_gap=tier["reducing_gap"])
+
+def fit_crop_box(w, h, target_w, target_h):
+    """Centered crop box (floats) of the source that ImageOps.fit would resample for (target_w, target_h)."""
+    src_ratio = w / h
+    out_ratio = target_w / target_h
+    if src_ratio == out_ratio:
+        crop_w, crop_h = w, h
+    elif src_ratio >= out_ratio:
+        crop_w, crop_h = out_ratio * h, h
+    else:
+        crop_w, crop_h = w, w / out_ratio
+    left = (w - crop_w) * 0.5
+    top = (h - crop_h) * 0.5
+    return (left, top, left + crop_w, top + crop_h)
+
+def contain_size(w, h, target_w, target_h):
+    """Size ImageOps.contain would scale (w, h) to inside (target_w, target_h)."""
+    src_ratio = w / h
+    out_ratio = target_w / target_h
+    if src_ratio > out_ratio:
+        return (target_w, round(h / w * target_w))
+    if src_ratio < out_ratio:
+        return (round(w / h * target_h), target_h)
+    return (target_w, target_h)
+
+def two_slice_geometry(w, h, target_w, target_h):
+    """Crop boxes, scaled sizes and paste offsets for 2-slice resizing a w x h bar to target_w x target_h."""
     # Use 1/3 of source width for each cap (ignore small command line arguments)
     left_cap = w // 3
     right_cap = w // 3
-    
+
     # Ensure caps don't overlap (leave some space in middle)
     if left_cap + right_cap > w * 0.8:  # Leave at least 20% for middle
         left_cap = int(w * 0.35)
         right_cap = int(w * 0.35)
 
-    left_region = bar_img.crop((0, 0, left_cap, h))
-    right_region = bar_img.crop((w - right_cap, 0, w, h))
-
     # Scale parts proportionally to maintain aspect ratio
     scale_factor = target_h / h
-    if scale_factor != 1.0:
-        new_left_w = int(left_region.width * scale_factor)
-        new_right_w = int(right_region.width * scale_factor)
-        left_region = left_region.resize((new_left_w, target_h), Image.LANCZOS)
-        right_region = right_region.resize((new_right_w, target_h), Image.LANCZOS)
+    scaled = scale_factor != 1.0
+    left_w = int(left_cap * scale_factor) if scaled else left_cap
+    right_w = int(right_cap * scale_factor) if scaled else right_cap
 
-    # Create canvas with solid background (sample from middle of original status bar)
-    canvas = Image.new("RGBA", (target_w, target_h))
-    
-    # Sample background color from the middle of the original status bar
+    # Background color is sampled from the middle column of the original status bar
     middle_x = w // 2
-    middle_sample = bar_img.crop((middle_x, 0, middle_x + 1, h))
-    if target_h != h:
-        middle_sample = middle_sample.resize((1, target_h), Image.LANCZOS)
-    
-    # Fill entire canvas with background color
-    for x in range(target_w):
-        canvas.paste(middle_sample, (x, 0))
-    
+    return {
+        "size": [target_w, target_h],
+        "scaled": scaled,
+        "left_box": [0, 0, left_cap, h],
+        "left_size": [left_w, target_h],
+        "right_box": [w - right_cap, 0, w, h],
+        "right_size": [right_w, target_h],
+        "right_offset": [target_w - right_w, 0],
+        "middle_box": [middle_x, 0, middle_x + 1, h],
+    }
+
+def render_two_slice(bar_img, geometry, resample="lanczos"):
+    """Render a status bar from a two_slice_geometry() plan."""
+    from PIL import Image
+    target_w, target_h = geometry["size"]
+    left_region = bar_img.crop(geometry["left_box"])
+    right_region = bar_img.crop(geometry["right_box"])
+    middle_sample = bar_img.crop(geometry["middle_box"])
+    if geometry["scaled"]:
+        left_region = resize_with_tier(left_region, tuple(geometry["left_size"]), resample)
+        right_region = resize_with_tier(right_region, tuple(geometry["right_size"]), resample)
+        middle_sample = resize_with_tier(middle_sample, (1, target_h), resample)
+
+    # Fill the canvas with the middle column; a NEAREST stretch of a 1px-wide
+    # image equals pasting it at every x
+    canvas = Image.new("RGBA", (target_w, target_h))
+    canvas.paste(middle_sample.resize((target_w, target_h), Image.NEAREST), (0, 0))
+
     # Paste left cap at original position
     if left_region.width > 0:
         canvas.paste(left_region, (0, 0))
-    
+
     # Paste right cap at the end
     if right_region.width > 0:
-        canvas.paste(right_region, (target_w - right_region.width, 0))
-    
+        canvas.paste(right_region, tuple(geometry["right_offset"]))
+
     return canvas
 
+def two_slice_resize_horizontal(bar_img: Image.Image, left_cap: int, right_cap: int, target_w: int, target_h: int, resample: str = "lanczos") -> Image.Image:
+    """Resize status bar by positioning left/right caps without stretching, filling middle with solid background."""
+    return render_two_slice(bar_img, two_slice_geometry(bar_img.width, bar_img.height, target_w, target_h), resample)
 
-def compose_cover_with_status_bar(src: Image.Image, target_w: int, target_h: int, sb_src_h: int, sb_target_h: int, left_cap: int, right_cap: int, content_mode: str = "cover") -> Image.Image:
-    """Compose an image with a preserved status bar.
-    Steps:
-      1) Slice top sb_src_h from source as status bar.
-      2) Fit the remainder to (target_w, target_h - sb_target_h) using specified content_mode.
-      3) 2-slice-resize the status bar to (target_w, sb_target_h) and paste on top.
+
+class RenderedBarCache:
+    """LRU cache of 2-slice rendered status bars, bounded by pixel memory.
+
+    Screenshots from one capture session usually share a byte-identical status
+    bar strip, so the key is a hash of the strip's pixels plus everything that
+    shapes the render (target size, caps, resampling tier).
     """
-    w, h = src.size
-    sb_src_h = max(1, min(sb_src_h, h - 1))
 
-    bar_strip = src.crop((0, 0, w, sb_src_h))
-    content = src.crop((0, sb_src_h, w, h))
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.entries = collections.OrderedDict()
+        self.bytes = 0
+        self.hits = self.misses = self.evictions = 0
+
+    def get_or_render(self, bar_strip, settings, render):
+        """Return the cached bar for (strip pixels, settings) or call render() and cache its result."""
+        if self.max_bytes <= 0:
+            return render()
+        import hashlib
+        digest = hashlib.blake2b(bar_strip.tobytes(), digest_size=16).digest()
+        key = (digest, bar_strip.mode, bar_strip.size) + tuple(settings)
+        bar = self.entries.get(key)
+        if bar is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return bar
+        self.misses += 1
+        bar = render()
+        size = bar.width * bar.height * len(bar.getbands())
+        if size <= self.max_bytes:
+            self.entries[key] = bar
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, old = self.entries.popitem(last=False)
+                self.bytes -= old.width * old.height * len(old.getbands())
+                self.evictions += 1
+        return bar
+
+    def counts(self):
+        return self.hits, self.misses, self.evictions
+
+    def add_counts(self, hits, misses, evictions):
+        """Fold in lookups made by another process's cache (see SharedImageTransport)."""
+        self.hits += hits
+        self.misses += misses
+        self.evictions += evictions
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            "entries": len(self.entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+        }
 
+# Rendered status bars shared across the batch (resized by --bar-cache-mb)
+BAR_CACHE = RenderedBarCache(64 * 1024 * 1024)
+
+def _pad_plan(w, h, target_w, target_h, color=None):
+    """Plan for ImageOps.pad-style letterboxing of a w x h image."""
+    inner = contain_size(w, h, target_w, target_h)
+    return {
+        "kind": "pad",
+        "size": [target_w, target_h],
+        "resize": list(inner),
+        "offset": [round((target_w - inner[0]) * 0.5), round((target_h - inner[1]) * 0.5)],
+        "color": color,
+    }
+
+def _smartbar_plan(w, h, target_w, target_h, sb_src_h, sb_target_h, left_cap, right_cap, content_mode="cover"):
+    """Plan for compose_cover_with_status_bar: bar/content crops, 2-slice bar geometry and content fit."""
+    sb_src_h = max(1, min(sb_src_h, h - 1))
+    content_h = h - sb_src_h
     content_target_h = max(1, target_h - sb_target_h)
-    
     if content_mode == "contain":
         # Letterbox/pad to exact size
-        content_fitted = ImageOps.pad(content, (target_w, content_target_h), method=Image.LANCZOS, color="black", centering=(0.5, 0.5))
+        content = _pad_plan(w, content_h, target_w, content_target_h, color="black")
     else:  # cover
         # Fill exactly, cropping as needed
-        content_fitted = ImageOps.fit(content, (target_w, content_target_h), method=Image.LANCZOS, centering=(0.5, 0.5))
+        content = {"kind": "fit", "size": [target_w, content_target_h],
+                   "box": list(fit_crop_box(w, content_h, target_w, content_target_h))}
+    return {
+        "kind": "smartbar",
+        "size": [target_w, target_h],
+        "sb_src": sb_src_h,
+        "sb_target": sb_target_h,
+        "left_cap": left_cap,
+        "right_cap": right_cap,
+        "bar_crop": [0, 0, w, sb_src_h],
+        "bar": two_slice_geometry(w, sb_src_h, target_w, sb_target_h),
+        "content_crop": [0, sb_src_h, w, h],
+        "content": content,
+        "content_offset": [0, sb_target_h],
+    }
 
-    bar_resized = two_slice_resize_horizontal(bar_strip, left_cap, right_cap, target_w, sb_target_h)
+def render_plan(img, plan, resample="lanczos"):
+    """Render one planned output: only crop/resize/paste calls with geometry taken from the plan."""
+    from PIL import Image
+    kind = plan["kind"]
+    size = tuple(plan["size"])
+    if kind == "fit":
+        return resize_with_tier(img, size, resample, box=tuple(plan["box"]))
+    if kind == "stretch":
+        return resize_with_tier(img, size, resample)
+    if kind == "pad":
+        resized = resize_with_tier(img, tuple(plan["resize"]), resample)
+        if resized.size == size:
+            return resized
+        out = Image.new(img.mode, size, plan["color"])
+        if resized.palette:
+            palette = resized.getpalette()
+            if palette is not None:
+                out.putpalette(palette)
+        out.paste(resized, tuple(plan["offset"]))
+        return out
+    if kind != "smartbar":
+        raise ValueError(f"Unknown plan kind: {kind}")
+
+    bar_strip = img.crop(plan["bar_crop"])
+    content = img.crop(plan["content_crop"])
+    content_fitted = render_plan(content, plan["content"], resample)
+    bar_resized = BAR_CACHE.get_or_render(
+        bar_strip,
+        (size[0], plan["sb_target"], plan["left_cap"], plan["right_cap"], resample),
+        lambda: render_two_slice(bar_strip, plan["bar"], resample),
+    )
 
     # Composite
     if content_fitted.mode != "RGBA":
@@ -412,24 +678,272 @@ def compose_cover_with_status_bar(src: Image.Image, target_w: int, target_h: int
     if bar_resized.mode != "RGBA":
         bar_resized = bar_resized.convert("RGBA")
 
-    canvas = Image.new("RGBA", (target_w, target_h))
+    canvas = Image.new("RGBA", size)
     canvas.paste(bar_resized, (0, 0))
-    canvas.paste(content_fitted, (0, sb_target_h))
+    canvas.paste(content_fitted, tuple(plan["content_offset"]))
     return canvas.convert("RGB")
 
-def process_image(path, out_dir, mode, device_hint, quality, format_override, allowed_families, smartbar_orientations=None):
-    img = Image.open(path)
-    img = ImageOps.exif_transpose(img)  # honor device orientation
-    w, h = img.size
+PNG_COLOR_TYPES = {"L": 0, "RGB": 2, "LA": 4, "RGBA": 6}
 
-    tw, th, fam, orien, group = pick_target(w, h, device_hint, allowed_families=allowed_families)
+class PngStreamWriter:
+    """Write an 8-bit PNG a band of rows at a time.
+
+    Rows use the PNG "Up" filter, computed per band with
+    ImageChops.subtract_modulo, and feed a single zlib stream, so only the
+    current band is ever held in memory.  icc_profile and transparency are
+    written as iCCP/tRNS chunks, as Pillow's PNG save does from Image.info.
+    """
+
+    def __init__(self, path, width, height, mode, compress_level=6, icc_profile=None, transparency=None):
+        self.f = open(path, "wb")
+        self.width, self.height, self.mode = width, height, mode
+        self.bpp = len(mode)
+        self.rows_written = 0
+        self.prev_row = None
+        self.z = zlib.compressobj(compress_level)
+        self.f.write(b"\x89PNG\r\n\x1a\n")
+        self._chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, PNG_COLOR_TYPES[mode], 0, 0, 0))
+        if icc_profile:
+            self._chunk(b"iCCP", b"ICC Profile\0\0" + zlib.compress(icc_profile))
+        if transparency is not None and mode == "L" and isinstance(transparency, int):
+            self._chunk(b"tRNS", struct.pack(">H", transparency))
+        elif transparency is not None and mode == "RGB" and isinstance(transparency, tuple):
+            self._chunk(b"tRNS", struct.pack(">HHH", *transparency))
+
+    def _chunk(self, kind, data):
+        self.f.write(struct.pack(">I", len(data)) + kind + data)
+        self.f.write(struct.pack(">I", zlib.crc32(data, zlib.crc32(kind)) & 0xFFFFFFFF))
+
+    def write_band(self, band):
+        from PIL import Image, ImageChops
+        if band.mode != self.mode or band.width != self.width:
+            raise ValueError(f"band is {band.mode} {band.size}, expected {self.mode} width {self.width}")
+        # Image of the row above each row: previous band's last row, then this band shifted down
+        above = Image.new(self.mode, band.size)
+        if self.prev_row is not None:
+            above.paste(self.prev_row, (0, 0))
+        if band.height > 1:
+            above.paste(band.crop((0, 0, band.width, band.height - 1)), (0, 1))
+        filtered = ImageChops.subtract_modulo(band, above).tobytes()
+        stride = self.width * self.bpp
+        raw = b"".join(b"\x02" + filtered[i:i + stride] for i in range(0, len(filtered), stride))
+        data = self.z.compress(raw)
+        if data:
+            self._chunk(b"IDAT", data)
+        self.prev_row = band.crop((0, band.height - 1, band.width, band.height))
+        self.rows_written += band.height
+
+    def abort(self):
+        """Close and delete a partially written file."""
+        self.f.close()
+        Path(self.f.name).unlink(missing_ok=True)
+
+    def close(self):
+        try:
+            if self.rows_written != self.height:
+                raise ValueError(f"wrote {self.rows_written} of {self.height} rows")
+            self._chunk(b"IDAT", self.z.flush())
+            self._chunk(b"IEND", b"")
+        finally:
+            self.f.close()
+
+def _resize_rows(img, region, box, size, y0, y1, resample):
+    """Rows y0..y1 of resizing region of img (box relative to region) to size, reading only the rows they need.
 
-    # Determine which targets to produce
-    jobs = []  # list of tuples (GROUP_LABEL, TW, TH)
-    if getattr(args_namespace, "each_group", False):
+    The strip handed to Pillow spans the filter support (scaled for
+    downsampling) plus a margin, and is clamped only at the region's real
+    edges, so each output row sees the same source rows as a full resize.
+    """
+    rx0, ry0, rx1, ry1 = region
+    bx0, by0, bx1, by1 = box
+    scale = (by1 - by0) / size[1]
+    reach = RESAMPLE_TIERS[resample]["support"] * max(scale, 1.0) + scale + 2
+    top = max(0, int(math.floor(by0 + y0 * scale - reach)))
+    bottom = min(ry1 - ry0, int(math.ceil(by0 + y1 * scale + reach)))
+    strip = img.crop((rx0, ry0 + top, rx1, ry0 + bottom))
+    return resize_with_tier(strip, (size[0], y1 - y0), resample,
+                            box=(bx0, by0 + y0 * scale - top, bx1, by0 + y1 * scale - top))
+
+def _iter_plan_bands(img, plan, region, band_rows, resample):
+    """Yield the output of a fit/stretch/pad plan over region of img as horizontal bands."""
+    from PIL import Image
+    out_w, out_h = plan["size"]
+    region_w, region_h = region[2] - region[0], region[3] - region[1]
+    kind = plan["kind"]
+    for y0 in range(0, out_h, band_rows):
+        y1 = min(out_h, y0 + band_rows)
+        if kind == "fit":
+            yield _resize_rows(img, region, plan["box"], (out_w, out_h), y0, y1, resample)
+        elif kind == "stretch":
+            yield _resize_rows(img, region, (0, 0, region_w, region_h), (out_w, out_h), y0, y1, resample)
+        elif kind == "pad":
+            inner_w, inner_h = plan["resize"]
+            off_x, off_y = plan["offset"]
+            band = Image.new(img.mode, (out_w, y1 - y0), plan["color"])
+            top, bottom = max(y0, off_y), min(y1, off_y + inner_h)
+            if top < bottom:
+                rows = _resize_rows(img, region, (0, 0, region_w, region_h), (inner_w, inner_h),
+                                    top - off_y, bottom - off_y, resample)
+                band.paste(rows, (off_x, top - y0))
+            yield band
+        else:
+            raise ValueError(f"Cannot band plan kind: {kind}")
+
+def banded_output_mode(img, plan):
+    """PNG mode the banded writer would produce for plan, or None if it must fall back to a full render."""
+    if plan["kind"] == "smartbar":
+        return "RGB" if plan["sb_target"] < plan["size"][1] else None
+    mode = "RGB" if img.mode == "RGBX" else img.mode  # shared-memory views of RGB sources
+    return mode if mode in PNG_COLOR_TYPES else None
+
+def _banded_png_info(img, plan):
+    """The icc_profile/transparency render_plan's output keeps from img: resized images carry img.info, new canvases do not."""
+    kind = plan["kind"]
+    if kind in ("fit", "stretch") or (kind == "pad" and list(plan["resize"]) == list(plan["size"])):
+        return {key: img.info[key] for key in ("icc_profile", "transparency") if key in img.info}
+    return {}
+
+def write_plan_png_banded(img, plan, out_path, band_rows, resample="lanczos"):
+    """Render plan into a PNG at out_path band by band; output matches render_plan within resampling rounding.
+
+    Neither the full output nor intermediate full-size copies (content crop,
+    fitted content, RGBA canvas) are created, so memory beyond the decoded
+    source scales with band_rows.
+    """
+    mode = banded_output_mode(img, plan)
+    out_w, out_h = plan["size"]
+    writer = PngStreamWriter(out_path, out_w, out_h, mode, **_banded_png_info(img, plan))
+    try:
+        if plan["kind"] == "smartbar":
+            bar_strip = img.crop(plan["bar_crop"])
+            bar = BAR_CACHE.get_or_render(
+                bar_strip,
+                (out_w, plan["sb_target"], plan["left_cap"], plan["right_cap"], resample),
+                lambda: render_two_slice(bar_strip, plan["bar"], resample),
+            )
+            writer.write_band(bar.convert("RGBA").convert("RGB"))
+            for band in _iter_plan_bands(img, plan["content"], tuple(plan["content_crop"]), band_rows, resample):
+                writer.write_band(band.convert("RGBA").convert("RGB"))
+        else:
+            for band in _iter_plan_bands(img, plan, (0, 0, img.width, img.height), band_rows, resample):
+                writer.write_band(band if band.mode == mode else band.convert(mode))
+        writer.close()
+    except BaseException:
+        # Keep the original error and leave no truncated PNG behind
+        writer.abort()
+        raise
+
+def compose_cover_with_status_bar(src: Image.Image, target_w: int, target_h: int, sb_src_h: int, sb_target_h: int, left_cap: int, right_cap: int, content_mode: str = "cover", resample: str = "lanczos") -> Image.Image:
+    """Compose an image with a preserved status bar.
+    Steps:
+      1) Slice top sb_src_h from source as status bar.
+      2) Fit the remainder to (target_w, target_h - sb_target_h) using specified content_mode.
+      3) 2-slice-resize the status bar to (target_w, sb_target_h) and paste on top.
+    """
+    plan = _smartbar_plan(src.width, src.height, target_w, target_h, sb_src_h, sb_target_h, left_cap, right_cap, content_mode)
+    return render_plan(src, plan, resample)
+
+MAX_BYTES_SEARCH_STEPS = 7   # bounded number of trial encodes per quality search
+MIN_JPEG_QUALITY = 40        # never go below this when fitting a JPEG under --max-bytes
+
+def parse_byte_size(text):
+    """Parse sizes like 500000, 800K, 8M or 1.5G (binary units) into bytes."""
+    m = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([kmg]?)i?b?\s*", text, re.IGNORECASE)
+    if not m:
+        raise argparse.ArgumentTypeError(f"invalid size: {text!r}")
+    scale = {"": 1, "k": 1024, "m": 1024 ** 2, "g": 1024 ** 3}[m.group(2).lower()]
+    return int(float(m.group(1)) * scale)
+
+def parse_still_specs(text):
+    """Parse --stills like "3,7.5s,f120" into (label, seconds, frame) tuples; one of seconds/frame is None."""
+    specs = []
+    for part in text.split(","):
+        m = re.fullmatch(r"\s*(?:f(\d+)|(\d+(?:\.\d+)?)s?)\s*", part, re.IGNORECASE)
+        if not m:
+            raise argparse.ArgumentTypeError(f"invalid still: {part!r} (use seconds like 3 or 7.5s, or a frame index like f120)")
+        if m.group(1) is not None:
+            specs.append((f"f{int(m.group(1))}", None, int(m.group(1))))
+        else:
+            specs.append((f"{float(m.group(2)):g}s", float(m.group(2)), None))
+    return specs
+
+def _encode(img, fmt, **kwargs):
+    buf = io.BytesIO()
+    img.save(buf, format=fmt, **kwargs)
+    return buf.getvalue()
+
+def encode_within_max_bytes(img, ext, quality, max_bytes, label=""):
+    """Encode img in memory so the result fits max_bytes, returning the encoded bytes.
+
+    Candidate settings are ordered from preferred to smallest (JPEG: quality
+    from the requested value down to MIN_JPEG_QUALITY; PNG: compress_level 6 up
+    to 9, then optimize=True).  The preferred setting is tried first, then a
+    binary search finds the first candidate that fits.  Every trial encode goes
+    to a BytesIO; if nothing fits, the smallest result is returned with a warning.
+    """
+    if ext in ("jpg", "jpeg"):
+        if img.mode not in ("RGB", "L", "CMYK"):
+            img = img.convert("RGB")
+        candidates = list(range(quality, MIN_JPEG_QUALITY - 1, -1)) or [quality]
+        trial = lambda q: _encode(img, "JPEG", quality=q, optimize=True, progressive=True)
+        describe = lambda q: f"JPEG quality {q}"
+    else:
+        candidates = [(6, False), (7, False), (8, False), (9, False), (9, True)]
+        trial = lambda c: _encode(img, "PNG", compress_level=c[0], optimize=c[1])
+        describe = lambda c: f"PNG compress_level {c[0]}" + (" +optimize" if c[1] else "")
+
+    encoded = {}
+    def encode_at(i):
+        if i not in encoded:
+            encoded[i] = trial(candidates[i])
+        return encoded[i]
+
+    best = 0 if len(encode_at(0)) <= max_bytes else None
+    lo, hi = 1, len(candidates) - 1
+    while best != 0 and lo <= hi and len(encoded) < MAX_BYTES_SEARCH_STEPS:
+        mid = (lo + hi) // 2
+        if len(encode_at(mid)) <= max_bytes:
+            best, hi = mid, mid - 1
+        else:
+            lo = mid + 1
+
+    if best is None:
+        smallest = min(encoded, key=lambda i: len(encoded[i]))
+        print(f"Warning: {label} is {len(encoded[smallest])} bytes at {describe(candidates[smallest])}, "
+              f"still over --max-bytes {max_bytes} after {len(encoded)} encode(s)"
+              + ("" if ext in ("jpg", "jpeg") else "; consider --format jpg"))
+        return encoded[smallest]
+    print(f"Info: {label}: {describe(candidates[best])} → {len(encoded[best])} bytes "
+          f"(limit {max_bytes}, {len(encoded)} encode(s))")
+    return encoded[best]
+
+# Options that shape output geometry, with their defaults when args_namespace lacks them
+PLAN_OPTION_DEFAULTS = {
+    "each_group": False,
+    "all_sizes": False,
+    "force_orientation": "source",
+    "sb_src": None,
+    "sb_target": None,
+    "sb_left": 200,
+    "sb_right": 200,
+    "smartbar_mode": "cover",
+}
+
+# Geometry plans memoized across the batch, keyed by source size and options
+GEOMETRY_PLANS = {}
+PLAN_STATS = {"hits": 0, "misses": 0}
+
+def plan_options():
+    return {name: getattr(args_namespace, name, default) for name, default in PLAN_OPTION_DEFAULTS.items()}
+
+def target_jobs(w, h, fam, orien, group, tw, th, options, use_video_targets=False):
+    """List of (group_label, TW, TH) outputs to produce for a source, per --each-group/--all-sizes/--force-orientation."""
+    targets = VIDEO_TARGETS if use_video_targets else TARGETS
+    jobs = []
+    if options["each_group"]:
         # One output per model group, optionally per orientation
-        fam_groups = list(TARGETS.get(fam, {}).keys())
-        force_or = getattr(args_namespace, "force_orientation", "source")
+        fam_groups = list(targets.get(fam, {}).keys())
+        force_or = options["force_orientation"]
         for grp in fam_groups:
             if force_or == "both":
                 orients = ["portrait", "landscape"]
@@ -438,17 +952,18 @@ def process_image(path, out_dir, mode, device_hint, quality, format_override, al
             else:  # source
                 orients = [orien]
             for orx in orients:
-                best_pair = closest_size_for_group(w, h, fam, grp, orx)
+                best_pair = closest_size_for_group(w, h, fam, grp, orx, use_video_targets=use_video_targets)
                 if best_pair:
                     jobs.append((grp, best_pair[0], best_pair[1]))
     else:
         # Original behavior: best group only
-        if getattr(args_namespace, "all_sizes", False):
+        if options["all_sizes"]:
             sizes = candidate_targets_for(
                 fam,
                 group,
                 orien,
-                getattr(args_namespace, "force_orientation", "source"),
+                options["force_orientation"],
+                use_video_targets=use_video_targets,
             )
             seen = set()
             sizes = [(x, y) for (x, y) in sizes if not ((x, y) in seen or seen.add((x, y)))]
@@ -456,55 +971,121 @@ def process_image(path, out_dir, mode, device_hint, quality, format_override, al
                 jobs.append((group, TW, TH))
         else:
             jobs = [(group, tw, th)]
+    return jobs
 
-    last_out = None
-    for (group_label, TW, TH) in jobs:
-        # Determine current target orientation
-        target_orien = orientation_of(TW, TH)
-        
-        # Check if we should use smartbar for this orientation
-        use_smartbar = (smartbar_orientations and target_orien in smartbar_orientations)
-        
-        if mode == "cover" and not use_smartbar:
-            # Fill exactly, cropping as needed
-            out_img = ImageOps.fit(img, (TW, TH), method=Image.LANCZOS, centering=(0.5, 0.5))
-        elif mode == "contain":
-            # Letterbox/pad to exact size
-            out_img = ImageOps.pad(img, (TW, TH), method=Image.LANCZOS, color=None, centering=(0.5, 0.5))
-        elif mode == "stretch":
-            # Distort to fit exact size (no aspect ratio preservation)
-            out_img = img.resize((TW, TH), Image.LANCZOS)
-        elif use_smartbar:
-            # Use provided sb_src or derive from device type
-            if args_namespace.sb_src is not None:
-                sb_src = args_namespace.sb_src
-            else:
-                # Use device-appropriate status bar height scaled to source resolution
-                sb_src = get_status_bar_height(fam, group_label, w, h)
-                if sb_src == 0:
-                    raise ValueError(f"No status bar defined for {fam} {group_label}. Use --sb-src to specify manually.")
-            
-            # Use provided sb_target or derive from device type  
-            if args_namespace.sb_target is not None:
-                sb_target = int(args_namespace.sb_target)
-            else:
-                # Use device-appropriate status bar height for target resolution
-                sb_target = get_status_bar_height(fam, group_label, TW, TH)
-                if sb_target == 0:
-                    sb_target = sb_src  # fallback to source height
-                    
-            out_img = compose_cover_with_status_bar(
-                img,
-                TW,
-                TH,
-                sb_src_h=sb_src,
-                sb_target_h=sb_target,
-                left_cap=int(args_namespace.sb_left),
-                right_cap=int(args_namespace.sb_right),
-                content_mode=args_namespace.smartbar_mode,
-            )
+def plan_target(w, h, fam, group_label, TW, TH, mode, smartbar_orientations, options):
+    """Plan one (group, TW, TH) output of a w x h source."""
+    # Determine current target orientation
+    target_orien = orientation_of(TW, TH)
+
+    # Check if we should use smartbar for this orientation
+    use_smartbar = (smartbar_orientations and target_orien in smartbar_orientations)
+
+    if mode == "cover" and not use_smartbar:
+        # Fill exactly, cropping as needed
+        job = {"kind": "fit", "size": [TW, TH], "box": list(fit_crop_box(w, h, TW, TH))}
+    elif mode == "contain":
+        # Letterbox/pad to exact size
+        job = _pad_plan(w, h, TW, TH)
+    elif mode == "stretch":
+        # Distort to fit exact size (no aspect ratio preservation)
+        job = {"kind": "stretch", "size": [TW, TH]}
+    elif use_smartbar:
+        # Use provided sb_src or derive from device type
+        if options["sb_src"] is not None:
+            sb_src = options["sb_src"]
+        else:
+            # Use device-appropriate status bar height scaled to source resolution
+            sb_src = get_status_bar_height(fam, group_label, w, h)
+            if sb_src == 0:
+                raise ValueError(f"No status bar defined for {fam} {group_label}. Use --sb-src to specify manually.")
+
+        # Use provided sb_target or derive from device type
+        if options["sb_target"] is not None:
+            sb_target = int(options["sb_target"])
         else:
-            raise ValueError(f"Unknown mode: {mode}")
+            # Use device-appropriate status bar height for target resolution
+            sb_target = get_status_bar_height(fam, group_label, TW, TH)
+            if sb_target == 0:
+                sb_target = sb_src  # fallback to source height
+
+        job = _smartbar_plan(w, h, TW, TH, sb_src, sb_target, int(options["sb_left"]), int(options["sb_right"]),
+                             options["smartbar_mode"])
+    else:
+        raise ValueError(f"Unknown mode: {mode}")
+    job["group"] = group_label
+    return job
+
+def geometry_plan(w, h, mode, device_hint, allowed_families, smartbar_orientations=None):
+    """Return the memoized geometry plan for a w x h source under the current options.
+
+    A plan holds the chosen family/orientation and, per output, exact crop
+    boxes, resize sizes, paste offsets and status bar heights, so sources that
+    share a size reuse it and rendering needs no further geometry decisions.
+    """
+    options = plan_options()
+    key = (w, h, mode, device_hint, None if allowed_families is None else tuple(allowed_families),
+           tuple(sorted(smartbar_orientations or ())), tuple(options.items()))
+    plan = GEOMETRY_PLANS.get(key)
+    if plan is not None:
+        PLAN_STATS["hits"] += 1
+        return plan
+    PLAN_STATS["misses"] += 1
+
+    tw, th, fam, orien, group = pick_target(w, h, device_hint, allowed_families=allowed_families)
+    jobs = target_jobs(w, h, fam, orien, group, tw, th, options)
+    plan = {
+        "source": [w, h],
+        "mode": mode,
+        "smartbar": sorted(smartbar_orientations or ()),
+        "options": options,
+        "family": fam,
+        "orientation": orien,
+        "group": group,
+        "jobs": [plan_target(w, h, fam, g, TW, TH, mode, smartbar_orientations, options) for (g, TW, TH) in jobs],
+    }
+    GEOMETRY_PLANS[key] = plan
+    return plan
+
+def export_geometry_plans(path):
+    """Write every plan computed in this run as JSON for inspection."""
+    Path(path).write_text(json.dumps(list(GEOMETRY_PLANS.values()), indent=2) + "\n")
+
+def write_job_output(img, job, out_path, ext, quality, max_bytes=None):
+    """Render one planned output of img and write it to out_path."""
+    resample = getattr(args_namespace, "resample", "lanczos")
+    band_rows = getattr(args_namespace, "band_rows", 0)
+    if band_rows and ext == "png" and not max_bytes and banded_output_mode(img, job):
+        write_plan_png_banded(img, job, out_path, band_rows, resample)
+        return
+
+    out_img = render_plan(img, job, resample)
+    if out_img.mode == "RGBX":
+        out_img = out_img.convert("RGB")
+    if max_bytes:
+        out_path.write_bytes(encode_within_max_bytes(out_img, ext, quality, max_bytes, label=out_path.name))
+    else:
+        save_kwargs = {}
+        if ext in ("jpg", "jpeg"):
+            save_kwargs.update({"quality": quality, "optimize": True, "progressive": True})
+        out_img.save(out_path, **save_kwargs)
+
+def process_image(path, out_dir, mode, device_hint, quality, format_override, allowed_families, smartbar_orientations=None, max_bytes=None,
+                  transport=None, img=None):
+    from PIL import Image, ImageOps
+    if img is None:
+        img = Image.open(path)
+        if img.getexif().get(0x0112, 1) != 1:
+            img = ImageOps.exif_transpose(img)  # honor device orientation
+    w, h = img.size
+
+    plan = geometry_plan(w, h, mode, device_hint, allowed_families, smartbar_orientations)
+    fam, orien = plan["family"], plan["orientation"]
+
+    tasks = []
+    for job in plan["jobs"]:
+        group_label = job["group"]
+        TW, TH = job["size"]
 
         # Build filename
         suffix = f"_{fam}_{TW}x{TH}"
@@ -516,19 +1097,138 @@ def process_image(path, out_dir, mode, device_hint, quality, format_override, al
         out_name = f"{stem}{suffix}.{ext}"
         fam_dir = Path(out_dir) / fam / group_label
         fam_dir.mkdir(parents=True, exist_ok=True)
-        out_path = fam_dir / out_name
+        tasks.append((job, fam_dir / out_name, ext, quality, max_bytes))
 
-        save_kwargs = {}
-        if ext in ("jpg", "jpeg"):
-            save_kwargs.update({"quality": quality, "optimize": True, "progressive": True})
-        out_img.save(out_path, **save_kwargs)
-        last_out = out_path
+    if transport is not None and len(tasks) > 1:
+        # Fan the outputs out to worker processes that read the decoded source from shared memory
+        transport.render(img, tasks)
+    else:
+        for task in tasks:
+            write_job_output(img, *task)
 
     # Return info about the last-produced file
-    return last_out, fam, orien, (TW, TH)
+    return tasks[-1][1], fam, orien, (TW, TH)
+
+class SharedImageTransport:
+    """Hand decoded sources to render worker processes through shared memory.
+
+    Each source is written once into a multiprocessing.shared_memory block;
+    workers map it with Image.frombuffer instead of unpickling a copy (RGB is
+    stored as RGBX so Pillow can map it), render their outputs and detach.
+    The block is unlinked once every output of the source has finished.
+    stats() reports segment lifecycle and byte counters for the run summary.
+    """
+
+    def __init__(self, workers):
+        from concurrent.futures import ProcessPoolExecutor
+        self.workers = workers
+        self.executor = ProcessPoolExecutor(workers, initializer=_init_render_worker, initargs=(args_namespace,))
+        self.live = {}  # segment name -> bytes
+        self.counters = {
+            "segments_created": 0, "segments_released": 0, "peak_live_bytes": 0,
+            "bytes_shared": 0,      # source pixels written into shared memory (one copy per source)
+            "bytes_mapped": 0,      # source pixels workers read in place
+            "bytes_copied": 0,      # source pixels workers had to copy (modes Pillow cannot map)
+            "bytes_pickled": 0,     # task and result messages between processes
+        }
+
+    def render(self, img, tasks):
+        import pickle
+        from concurrent.futures import wait
+        shm, ref = self._share(img)
+        try:
+            futures = []
+            for task in tasks:
+                self.counters["bytes_pickled"] += len(pickle.dumps((ref,) + task))
+                futures.append(self.executor.submit(_render_shared_task, ref, *task))
+            # Every worker must be done with the block before it is unlinked
+            wait(futures)
+            errors = []
+            for future in futures:
+                try:
+                    copied, bar_cache_counts = result = future.result()
+                except Exception as e:
+                    errors.append(str(e))
+                    continue
+                self.counters["bytes_pickled"] += len(pickle.dumps(result))
+                self.counters["bytes_copied" if copied else "bytes_mapped"] += ref["nbytes"]
+                # Workers keep their own status bar caches; report their lookups with the main one
+                BAR_CACHE.add_counts(*bar_cache_counts)
+            if errors:
+                raise ValueError("; ".join(errors))
+        finally:
+            self._release(shm)
+
+    def _share(self, img):
+        from multiprocessing import shared_memory
+        rawmode = "RGBX" if img.mode == "RGB" else img.mode
+        data = img.tobytes("raw", rawmode)
+        shm = shared_memory.SharedMemory(create=True, size=max(1, len(data)))
+        shm.buf[:len(data)] = data
+        ref = {
+            "name": shm.name, "nbytes": len(data), "mode": img.mode, "rawmode": rawmode, "size": img.size,
+            "palette": img.getpalette() if img.mode == "P" else None, "info": dict(img.info),
+        }
+        self.live[shm.name] = len(data)
+        self.counters["segments_created"] += 1
+        self.counters["bytes_shared"] += len(data)
+        self.counters["peak_live_bytes"] = max(self.counters["peak_live_bytes"], sum(self.live.values()))
+        return shm, ref
+
+    def _release(self, shm):
+        shm.close()
+        shm.unlink()
+        del self.live[shm.name]
+        self.counters["segments_released"] += 1
+
+    def close(self):
+        self.executor.shutdown()
+        for name in list(self.live):
+            print(f"Warning: shared memory segment {name} was not released")
+
+    def stats(self):
+        return dict(self.counters, workers=self.workers, live_segments=len(self.live))
+
+def _init_render_worker(namespace):
+    global args_namespace
+    args_namespace = namespace
+    BAR_CACHE.max_bytes = int(getattr(namespace, "bar_cache_mb", 64) * 1024 * 1024)
+
+def _render_shared_task(ref, job, out_path, ext, quality, max_bytes):
+    """Worker side of SharedImageTransport: render one output from a mapped source.
+
+    Returns (copied, bar cache hit/miss/eviction deltas), where copied is
+    True if the source had to be copied out of shared memory.  The view must
+    be gone before the block is closed, so errors are re-raised as
+    plain messages rather than with tracebacks that keep it alive.
+    """
+    from multiprocessing import shared_memory
+    from PIL import Image
+    shm = shared_memory.SharedMemory(name=ref["name"])
+    view = Image.frombuffer(ref["mode"], ref["size"], shm.buf[:ref["nbytes"]], "raw", ref["rawmode"], 0, 1)
+    copied = not view.readonly  # frombuffer only maps modes Pillow can share, otherwise it copies
+    if ref["palette"] is not None:
+        view.putpalette(ref["palette"])
+    view.info.update(ref["info"])
+    error = None
+    before = BAR_CACHE.counts()
+    try:
+        write_job_output(view, job, out_path, ext, quality, max_bytes)
+    except Exception as e:
+        error = f"{out_path.name}: {e}"
+    del view
+    shm.close()
+    if error:
+        raise ValueError(error)
+    return copied, tuple(after - start for after, start in zip(BAR_CACHE.counts(), before))
 
 def get_video_info(video_path):
     """Get video dimensions, frame rate, and duration using ffprobe"""
+    info = probe_video(video_path)
+    return info["width"], info["height"], info["fps"], info["duration"]
+
+def probe_video(video_path):
+    """ffprobe a video: width, height, fps, duration and the video stream's codec_name and profile."""
     try:
         cmd = [
             'ffprobe', '-v', 'quiet', '-print_format', 'json', 
@@ -548,12 +1248,132 @@ def get_video_info(video_path):
         # Get duration from format info
         duration = float(info.get('format', {}).get('duration', 0))
         
-        return width, height, fps, duration
+        return {"width": width, "height": height, "fps": fps, "duration": duration,
+                "codec": video_stream.get('codec_name', ''), "profile": video_stream.get('profile', '')}
     except (subprocess.CalledProcessError, json.JSONDecodeError, KeyError) as e:
         raise ValueError(f"Failed to get video info: {e}")
 
-def process_video(path, out_dir, mode, device_hint, quality, format_override, allowed_families, smartbar_orientations=None, video_codec="libx264", crf=18, app_store_optimize=False):
-    """Process video files with same logic as images, using ffmpeg for video operations"""
+VIDEO_AUDIO_RESERVE_KBPS = 256   # budget kept for the copied audio track under --max-bytes
+VIDEO_CONTAINER_OVERHEAD = 0.97  # fraction of --max-bytes left for streams after mp4 overhead
+MIN_VIDEO_KBPS = 300
+
+def video_bitrate_for_max_bytes(max_bytes, duration):
+    """Return the peak video bitrate (kbit/s) that keeps an encode of duration seconds under max_bytes."""
+    if duration <= 0:
+        return None
+    total_kbps = max_bytes * 8 * VIDEO_CONTAINER_OVERHEAD / duration / 1000
+    return int(total_kbps - VIDEO_AUDIO_RESERVE_KBPS)
+
+FFMPEG_STDERR_TAIL_LINES = 20   # stderr lines kept for error reports
+PROGRESS_LOG_INTERVAL = 10.0     # seconds between progress lines when stderr is not a terminal
+
+# Machine-readable run statistics, written by --summary-json
+RUN_SUMMARY = {"ffmpeg_jobs": []}
+
+def _format_eta(seconds):
+    if seconds is None or not math.isfinite(seconds):
+        return "--:--"
+    seconds = int(seconds)
+    return f"{seconds // 60:02d}:{seconds % 60:02d}" if seconds < 3600 else f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+
+def run_ffmpeg(cmd, label, duration, fps, batch):
+    """Run an ffmpeg command, reporting its -progress stream live; return throughput stats.
+
+    batch holds jobs/index/total_media/done_media/start for the encodes of the
+    current source so the ETA covers the remaining outputs too.  On failure the
+    last FFMPEG_STDERR_TAIL_LINES lines of ffmpeg's stderr are included in the
+    raised ValueError.
+    """
+    cmd = [cmd[0], '-hide_banner', '-nostats', '-progress', 'pipe:1'] + cmd[1:]
+    total_frames = int(duration * fps) if duration and fps else 0
+    tail = collections.deque(maxlen=FFMPEG_STDERR_TAIL_LINES)
+    tty = sys.stderr.isatty()
+
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, errors="replace")
+    drain = threading.Thread(target=lambda: tail.extend(line.rstrip() for line in proc.stderr), daemon=True)
+    drain.start()
+
+    start = time.perf_counter()
+    last_log = start
+    state = {}
+    frames, media_done = 0, 0.0
+    for line in proc.stdout:
+        key, _, value = line.strip().partition("=")
+        if key != "progress":
+            state[key] = value
+            continue
+        frames = int(state.get("frame", frames) or 0)
+        out_us = state.get("out_time_us", "")
+        if out_us.lstrip("-").isdigit():
+            media_done = max(0.0, int(out_us) / 1e6)
+        now = time.perf_counter()
+        elapsed = now - start
+        enc_fps = frames / elapsed if elapsed > 0 else 0.0
+        speed = media_done / elapsed if elapsed > 0 else 0.0
+        job_eta = (duration - media_done) / speed if speed > 0 else None
+        batch_done = batch["done_media"] + media_done
+        batch_elapsed = now - batch["start"]
+        batch_eta = (batch["total_media"] - batch_done) / (batch_done / batch_elapsed) if batch_done > 0 else None
+        frame_text = f"{frames}/{total_frames}" if total_frames else str(frames)
+        status = (f"  [{batch['index']}/{batch['jobs']}] {label}: frame {frame_text}  {enc_fps:.1f} fps  "
+                  f"{speed:.2f}x  ETA {_format_eta(job_eta)} (batch {_format_eta(batch_eta)})")
+        if tty:
+            print(f"\r{status}\033[K", end="", file=sys.stderr, flush=True)
+        elif value == "end" or now - last_log >= PROGRESS_LOG_INTERVAL:
+            print(status, file=sys.stderr, flush=True)
+            last_log = now
+    returncode = proc.wait()
+    drain.join()
+    if tty:
+        print(file=sys.stderr)
+
+    if returncode != 0:
+        details = "\n".join(f"    {l}" for l in tail if l)
+        raise ValueError(f"ffmpeg failed (exit {returncode}) for {label}:\n{details}")
+
+    wall = time.perf_counter() - start
+    return {
+        "frames": frames,
+        "media_seconds": round(media_done, 3),
+        "wall_seconds": round(wall, 3),
+        "encode_fps": round(frames / wall, 2) if wall > 0 else None,
+        "speed": round(media_done / wall, 3) if wall > 0 else None,
+    }
+
+def duration_window(duration, trim_start=0.0, trim_length=None, fit=False):
+    """Return (start, length, pad) in seconds for a preview's output timeline.
+
+    start/length select the input window (length None keeps everything after
+    start); pad is how long the last frame is held to reach the App Store
+    minimum.  fit trims anything past APP_PREVIEW_MAX_DURATION and pads clips
+    shorter than APP_PREVIEW_MIN_DURATION; an explicit trim_length is capped
+    at APP_PREVIEW_MAX_DURATION.
+    """
+    start = max(0.0, trim_start or 0.0)
+    available = max(0.0, duration - start)
+    length = None
+    if trim_length or fit:
+        limit = min(trim_length or APP_PREVIEW_MAX_DURATION, APP_PREVIEW_MAX_DURATION)
+        if available > limit:
+            length = limit
+    kept = available if length is None else length
+    pad = max(0.0, APP_PREVIEW_MIN_DURATION - kept) if fit else 0.0
+    return start, length, pad
+
+def write_run_summary(path, **extra):
+    """Write RUN_SUMMARY plus extra top-level fields as JSON."""
+    summary = dict(extra, **RUN_SUMMARY)
+    Path(path).write_text(json.dumps(summary, indent=2) + "\n")
+
+def process_video(path, out_dir, mode, device_hint, quality, format_override, allowed_families, smartbar_orientations=None, video_codec="libx264", crf=18, app_store_optimize=False, max_bytes=None,
+                  trim_start=0.0, trim_length=None, fit_duration=False, stills=None, poster=None):
+    """Process video files with same logic as images, using ffmpeg for video operations
+
+    stills (from parse_still_specs) are extracted during the first encode and
+    rendered through the image pipeline at TARGETS sizes; poster writes a PNG
+    frame at that time next to every video output.  Both are measured on the
+    output timeline, after --trim-start.
+    """
     
     # Get video dimensions and info
     try:
@@ -564,6 +1384,18 @@ def process_video(path, out_dir, mode, device_hint, quality, format_override, al
     # Validate App Store Connect requirements
     file_size_mb = path.stat().st_size / (1024 * 1024)  # Size in MB
     
+    # Trim/pad window, applied inside the same encode as scaling
+    start, length, pad = duration_window(duration, trim_start, trim_length, fit_duration)
+    if start and start >= duration > 0:
+        raise ValueError(f"--trim-start {start:g}s is past the end of {path} ({duration:.1f}s)")
+    trimming = bool(start) or length is not None
+    source_duration = duration
+    duration = (length if length is not None else max(0.0, duration - start)) + pad
+    if trimming:
+        print(f"Info: Trimming {path} to {start:.1f}s-{start + duration - pad:.1f}s of {source_duration:.1f}s")
+    if pad:
+        print(f"Info: Holding the last frame of {path} for {pad:.1f}s to reach {APP_PREVIEW_MIN_DURATION:.0f}s")
+
     if duration < 15:
         print(f"Warning: Video {path} is {duration:.1f}s (minimum 15s for App Store Connect)")
     elif duration > 30:
@@ -572,6 +1404,16 @@ def process_video(path, out_dir, mode, device_hint, quality, format_override, al
     if file_size_mb > 500:
         print(f"Warning: Video {path} is {file_size_mb:.1f}MB (maximum 500MB for App Store Connect)")
     
+    if poster is not None and poster >= duration:
+        print(f"Warning: --poster {poster:g}s is past the end of {path} ({duration:.1f}s); skipping poster")
+        poster = None
+    # Each still as (label, select expression): timestamps select on frame time, which
+    # stays correct for variable frame rate screen recordings; fN selects the Nth frame
+    still_frames = {}
+    for label, seconds, frame in stills or ():
+        still_frames.setdefault(label, f"eq(n,{frame})" if frame is not None else f"gte(t,{seconds:g})")
+    still_frames = list(still_frames.items())
+
     # Determine target framerate (max 30fps for App Store Connect)
     target_fps = min(fps, 30.0)
     if fps > 30:
@@ -580,41 +1422,14 @@ def process_video(path, out_dir, mode, device_hint, quality, format_override, al
     tw, th, fam, orien, group = pick_target(w, h, device_hint, allowed_families=allowed_families, use_video_targets=True)
 
     # Determine which targets to produce (same logic as images but using VIDEO_TARGETS)
-    jobs = []
-    if getattr(args_namespace, "each_group", False):
-        # One output per model group, optionally per orientation
-        fam_groups = list(VIDEO_TARGETS.get(fam, {}).keys())
-        force_or = getattr(args_namespace, "force_orientation", "source")
-        for grp in fam_groups:
-            if force_or == "both":
-                orients = ["portrait", "landscape"]
-            elif force_or in ("portrait", "landscape"):
-                orients = [force_or]
-            else:  # source
-                orients = [orien]
-            for orx in orients:
-                best_pair = closest_size_for_group(w, h, fam, grp, orx, use_video_targets=True)
-                if best_pair:
-                    jobs.append((grp, best_pair[0], best_pair[1]))
-    else:
-        # Original behavior: best group only
-        if getattr(args_namespace, "all_sizes", False):
-            sizes = candidate_targets_for(
-                fam,
-                group,
-                orien,
-                getattr(args_namespace, "force_orientation", "source"),
-                use_video_targets=True
-            )
-            seen = set()
-            sizes = [(x, y) for (x, y) in sizes if not ((x, y) in seen or seen.add((x, y)))]
-            for (TW, TH) in sizes:
-                jobs.append((group, TW, TH))
-        else:
-            jobs = [(group, tw, th)]
+    jobs = target_jobs(w, h, fam, orien, group, tw, th, plan_options(), use_video_targets=True)
 
+    # Progress across all encodes of this source, used for the batch ETA
+    batch = {"jobs": len(jobs), "index": 0, "total_media": duration * len(jobs), "done_media": 0.0,
+             "start": time.perf_counter()}
     last_out = None
     for (group_label, TW, TH) in jobs:
+        batch["index"] += 1
         # Determine current target orientation
         target_orien = orientation_of(TW, TH)
         
@@ -631,7 +1446,12 @@ def process_video(path, out_dir, mode, device_hint, quality, format_override, al
         out_path = fam_dir / out_name
 
         # Build ffmpeg command based on mode
-        cmd = ['ffmpeg', '-y', '-i', str(path)]
+        cmd = ['ffmpeg', '-y']
+        if start:
+            cmd.extend(['-ss', f'{start:g}'])  # input seek: frames before the window are never filtered or encoded
+        if length is not None:
+            cmd.extend(['-t', f'{length:g}'])
+        cmd.extend(['-i', str(path)])
         
         if use_smartbar:
             # For smartbar mode, we need to extract first frame, process it, then apply to video
@@ -647,21 +1467,44 @@ def process_video(path, out_dir, mode, device_hint, quality, format_override, al
             filters.append(f"fps={target_fps}")
         
         if not use_smartbar:
+            # Same resampling tier as the image path
+            flags = RESAMPLE_TIERS[getattr(args_namespace, "resample", "lanczos")]["ffmpeg"]
             # Simple video resize modes
             if mode == "cover" or (mode == "cover" and not use_smartbar):
                 # Crop to fill (equivalent to cover)
-                filters.append(f"scale={TW}:{TH}:force_original_aspect_ratio=increase,crop={TW}:{TH}")
+                filters.append(f"scale={TW}:{TH}:flags={flags}:force_original_aspect_ratio=increase,crop={TW}:{TH}")
             elif mode == "contain":
                 # Letterbox (equivalent to contain)
-                filters.append(f"scale={TW}:{TH}:force_original_aspect_ratio=decrease,pad={TW}:{TH}:(ow-iw)/2:(oh-ih)/2:black")
+                filters.append(f"scale={TW}:{TH}:flags={flags}:force_original_aspect_ratio=decrease,pad={TW}:{TH}:(ow-iw)/2:(oh-ih)/2:black")
             elif mode == "stretch":
                 # Stretch to exact dimensions
-                filters.append(f"scale={TW}:{TH}")
+                filters.append(f"scale={TW}:{TH}:flags={flags}")
             else:
-                filters.append(f"scale={TW}:{TH}:force_original_aspect_ratio=increase,crop={TW}:{TH}")
+                filters.append(f"scale={TW}:{TH}:flags={flags}:force_original_aspect_ratio=increase,crop={TW}:{TH}")
         
-        # Apply filters if any
-        if filters:
+        # Freeze the last frame after scaling so the clones are already target-sized
+        if pad:
+            filters.append(f"tpad=stop_mode=clone:stop_duration={pad:.3f}")
+
+        # Stills for the image pipeline are taken from the first output's decode
+        extract_stills = bool(still_frames) and batch["index"] == 1
+        if extract_stills or poster is not None:
+            # Extra outputs branch off the same decode: stills before any filtering, the poster after scaling
+            graph = []
+            source = "[0:v]"
+            if extract_stills:
+                graph.append(f"[0:v]split={len(still_frames) + 1}[src]" + "".join(f"[still{i}]" for i in range(len(still_frames))))
+                graph.extend(f"[still{i}]select='{expr}'[s{i}]" for i, (_, expr) in enumerate(still_frames))
+                source = "[src]"
+            chain = ",".join(filters) or "null"
+            if poster is not None:
+                graph.append(f"{source}{chain},split=2[venc][vposter]")
+                graph.append(f"[vposter]select='gte(t,{poster:g})'[poster]")
+            else:
+                graph.append(f"{source}{chain}[venc]")
+            cmd.extend(['-filter_complex', ';'.join(graph), '-map', '[venc]', '-map', '0:a?'])
+        elif filters:
+            # Apply filters if any
             cmd.extend(['-vf', ','.join(filters)])
         
         # Add codec and quality options
@@ -675,41 +1518,446 @@ def process_video(path, out_dir, mode, device_hint, quality, format_override, al
             cmd.extend(['-pix_fmt', 'yuv420p']) # Compatibility
         else:
             cmd.extend(['-c:v', video_codec, '-crf', str(crf)])
-            
-        cmd.extend(['-c:a', 'copy'])  # Copy audio without re-encoding
+
+        if max_bytes:
+            # Capped CRF: keep the CRF quality target but bound the rate so the file fits
+            video_kbps = video_bitrate_for_max_bytes(max_bytes, duration)
+            if video_kbps is None:
+                print(f"Warning: Unknown duration for {path}; cannot apply --max-bytes")
+            else:
+                if video_kbps < MIN_VIDEO_KBPS:
+                    print(f"Warning: --max-bytes {max_bytes} leaves {video_kbps}kbps for {duration:.1f}s of video; using {MIN_VIDEO_KBPS}kbps")
+                    video_kbps = MIN_VIDEO_KBPS
+                print(f"Info: {out_name}: capping video at {video_kbps}kbps for {duration:.1f}s "
+                      f"(limit {max_bytes} bytes, {VIDEO_AUDIO_RESERVE_KBPS}kbps reserved for audio)")
+                cmd.extend(['-maxrate', f'{video_kbps}k', '-bufsize', f'{video_kbps * 2}k'])
+
+        if trimming or pad:
+            # Cut audio on the same window and pad it with silence to the video's length
+            if pad:
+                cmd.extend(['-af', f'apad=whole_dur={duration:.3f}'])
+            cmd.extend(['-c:a', 'aac', '-b:a', f'{VIDEO_AUDIO_RESERVE_KBPS}k'])
+        else:
+            cmd.extend(['-c:a', 'copy'])  # Copy audio without re-encoding
         cmd.extend(['-movflags', '+faststart'])  # Optimize for web playback
         cmd.append(str(out_path))
-        
-        try:
-            subprocess.run(cmd, check=True, capture_output=True)
-            last_out = out_path
-        except subprocess.CalledProcessError as e:
-            raise ValueError(f"ffmpeg failed: {e}")
+        job_outputs = {}
+        if poster is not None:
+            poster_path = out_path.with_name(f"{out_path.stem}{POSTER_SUFFIX}.png")
+            cmd.extend(['-map', '[poster]', '-frames:v', '1', str(poster_path)])
+            job_outputs["poster"] = str(poster_path)
+
+        if extract_stills:
+            import tempfile
+            with tempfile.TemporaryDirectory(prefix="smartbar-stills-") as still_dir:
+                for i in range(len(still_frames)):
+                    cmd.extend(['-map', f'[s{i}]', '-frames:v', '1', str(Path(still_dir) / f"still_{i}.png")])
+                job_stats = run_ffmpeg(cmd, out_name, duration, target_fps, batch)
+                job_outputs["stills"] = process_video_stills(
+                    path, Path(still_dir), still_frames, out_dir, mode, device_hint,
+                    quality, format_override, allowed_families, smartbar_orientations, max_bytes,
+                )
+        else:
+            job_stats = run_ffmpeg(cmd, out_name, duration, target_fps, batch)
+        RUN_SUMMARY["ffmpeg_jobs"].append(dict(job_stats, input=str(path), output=str(out_path), **job_outputs))
+        if max_bytes and out_path.exists() and out_path.stat().st_size > max_bytes:
+            # The bitrate cap only bounds video; copied audio can exceed its reserve
+            print(f"Warning: {out_name} is {out_path.stat().st_size} bytes, over --max-bytes {max_bytes}"
+                  + ("; the copied audio track may exceed the "
+                     f"{VIDEO_AUDIO_RESERVE_KBPS}kbps reserve" if not (trimming or pad) else ""))
+        batch["done_media"] += duration
+        last_out = out_path
 
     return last_out, fam, orien, (TW, TH)
 
-def iter_paths(input_path):
+def process_video_stills(path, still_dir, still_frames, out_dir, mode, device_hint, quality, format_override,
+                         allowed_families, smartbar_orientations, max_bytes):
+    """Render frames extracted by process_video (still_dir/still_<i>.png) through the image pipeline; return the outputs written."""
+    from PIL import Image
+    outputs = []
+    for i, (label, _) in enumerate(still_frames):
+        file = still_dir / f"still_{i}.png"
+        if not file.exists():
+            print(f"Warning: {path} has no frame for still {label}")
+            continue
+        img = Image.open(file)
+        img.load()
+        still_path = Path(path).with_name(f"{Path(path).stem}_still_{label}.png")
+        out_path, fam, orien, size = process_image(
+            still_path, out_dir, mode, device_hint, quality, format_override, allowed_families,
+            smartbar_orientations=smartbar_orientations, max_bytes=max_bytes, img=img,
+        )
+        print(f"  still {label} → {out_path.name} ({fam}, {orien}, {size[0]}x{size[1]})")
+        outputs.append(str(out_path))
+    return outputs
+
+IMAGE_EXTS = {".png", ".jpg", ".jpeg", ".heic", ".heif", ".webp", ".tif", ".tiff", ".bmp"}
+VIDEO_EXTS = {".mp4", ".mov", ".avi", ".mkv", ".webm", ".m4v"}
+MEDIA_EXTS = IMAGE_EXTS | VIDEO_EXTS
+
+def _ext_of(name):
+    dot = name.rfind(".")
+    return name[dot:].lower() if dot > 0 else ""
+
+def _glob_match(rel, name, patterns):
+    """Match a pattern against the relative path (if it contains '/') or the bare file name."""
+    for pat in patterns:
+        if fnmatch.fnmatchcase(rel if "/" in pat else name, pat):
+            return True
+    return False
+
+def iter_paths(input_path, include=None, exclude=None, symlinks="files"):
+    """Walk input_path with os.scandir, yielding media files as they are discovered.
+
+    Extension filtering happens on the entry name before any file check, and
+    DirEntry.is_file()/is_dir() use the d_type cached by scandir, so regular
+    files cost no extra stat.  include/exclude are fnmatch globs matched against
+    the path relative to input_path (when the pattern has a '/') or the file
+    name; exclude also prunes directories.  symlinks: "files" keeps symlinked
+    files but does not descend into symlinked directories, "follow" descends
+    too (each real directory is visited once), "skip" ignores all symlinks.
+    """
     p = Path(input_path)
-    image_exts = {".png", ".jpg", ".jpeg", ".heic", ".heif", ".webp", ".tif", ".tiff", ".bmp"}
-    video_exts = {".mp4", ".mov", ".avi", ".mkv", ".webm", ".m4v"}
-    all_exts = image_exts | video_exts
+    include = list(include or [])
+    exclude = list(exclude or [])
     if p.is_file():
-        if p.suffix.lower() in all_exts:
+        if _ext_of(p.name) in MEDIA_EXTS:
             yield p
         return
-    for fp in p.rglob("*"):
-        if fp.is_file() and fp.suffix.lower() in all_exts:
-            yield fp
+    if not p.is_dir():
+        return
+
+    follow = symlinks == "follow"
+    seen_dirs = set()
+    if follow:
+        st = p.stat()
+        seen_dirs.add((st.st_dev, st.st_ino))
+    stack = [(str(p), "")]
+    while stack:
+        dir_path, rel_dir = stack.pop()
+        try:
+            it = os.scandir(dir_path)
+        except OSError as e:
+            print(f"Warning: cannot scan {dir_path}: {e}", file=sys.stderr)
+            continue
+        subdirs = []
+        with it:
+            for entry in it:
+                name = entry.name
+                rel = f"{rel_dir}{name}"
+                try:
+                    is_link = entry.is_symlink()
+                    if is_link and symlinks == "skip":
+                        continue
+                    # Directories named like media (e.g. exports.png/) fall through and are descended
+                    if _ext_of(name) in MEDIA_EXTS and entry.is_file(follow_symlinks=is_link):
+                        if include and not _glob_match(rel, name, include):
+                            continue
+                        if exclude and _glob_match(rel, name, exclude):
+                            continue
+                        yield Path(entry.path)
+                    elif entry.is_dir(follow_symlinks=follow):
+                        if exclude and _glob_match(rel, name, exclude):
+                            continue
+                        if follow:
+                            st = entry.stat()
+                            key = (st.st_dev, st.st_ino)
+                            if key in seen_dirs:
+                                continue
+                            seen_dirs.add(key)
+                        subdirs.append((entry.path, rel + "/"))
+                except OSError:
+                    continue
+        # Reverse so directories are visited in the order scandir returned them
+        stack.extend(reversed(subdirs))
+
+def scan_inputs(inputs, include=None, exclude=None, symlinks="files", queue_size=256):
+    """Yield media files from all inputs while a background thread keeps scanning.
+
+    The walker runs ahead of the consumer through a bounded queue, so the first
+    resize starts as soon as the first file is found and slow directory listings
+    (network mounts) overlap with processing instead of preceding it.
+    """
+    q = queue.Queue(maxsize=queue_size)
+    done = object()
+
+    def producer():
+        try:
+            for input_path in inputs:
+                for fp in iter_paths(input_path, include, exclude, symlinks):
+                    q.put(fp)
+        except BaseException as e:  # surface scanner errors in the consumer
+            q.put(e)
+        finally:
+            q.put(done)
+
+    threading.Thread(target=producer, name="scan", daemon=True).start()
+    while True:
+        item = q.get()
+        if item is done:
+            return
+        if isinstance(item, BaseException):
+            raise item
+        yield item
 
 def is_video_file(path):
-    video_exts = {".mp4", ".mov", ".avi", ".mkv", ".webm", ".m4v"}
-    return Path(path).suffix.lower() in video_exts
+    return _ext_of(Path(path).name) in VIDEO_EXTS
+
+# App Store Connect limits checked by --validate
+APP_PREVIEW_EXTS = {".mp4", ".mov", ".m4v"}
+APP_PREVIEW_MAX_FPS = 30.0
+APP_PREVIEW_MIN_DURATION = 15.0
+APP_PREVIEW_MAX_DURATION = 30.0
+APP_PREVIEW_MAX_BYTES = 500 * 1024 * 1024
+# Accepted preview codecs (ffprobe codec_name): H.264 up to High profile, ProRes 422 HQ in .mov
+APP_PREVIEW_H264_PROFILES = {"Constrained Baseline", "Baseline", "Main", "High"}
+APP_PREVIEW_CODECS = {"h264": APP_PREVIEW_EXTS, "prores": {".mov"}}
+
+def inspect_output_file(path):
+    """Read only what validation needs: image headers via a lazy Image.open, ffprobe metadata for videos."""
+    info = {"path": path, "bytes": path.stat().st_size, "video": is_video_file(path)}
+    if info["video"]:
+        info.update(probe_video(path))
+    else:
+        from PIL import Image
+        # Image.open parses the header only; pixel data is never decoded here
+        with Image.open(path) as im:
+            info["width"], info["height"] = im.size
+            info["format"] = im.format
+            info["mode"] = im.mode
+            info["transparency"] = "transparency" in im.info
+    return info
+
+POSTER_SUFFIX = "_poster"
+
+def _output_stem(path):
+    """Stem of an output file without the --poster suffix."""
+    stem = path.stem
+    return stem[:-len(POSTER_SUFFIX)] if stem.endswith(POSTER_SUFFIX) else stem
+
+def check_output_file(info, fam, group):
+    """Return a list of violation messages for one inspected output file."""
+    path = info["path"]
+    w, h = info["width"], info["height"]
+    problems = []
+    # Poster frames are sized like the preview they belong to
+    targets = VIDEO_TARGETS if info["video"] or path.stem.endswith(POSTER_SUFFIX) else TARGETS
+    orientations = targets.get(fam, {}).get(group)
+    if orientations is None:
+        return [f"unknown {'video' if info['video'] else 'screenshot'} group {fam}/{group}"]
+
+    matched_orien = next((o for o, dims in orientations.items() if (w, h) in dims), None)
+    if matched_orien is None:
+        allowed = ", ".join(f"{x}x{y}" for dims in orientations.values() for (x, y) in dims) or "none"
+        problems.append(f"{w}x{h} is not an allowed size for {group} (allowed: {allowed})")
+    elif matched_orien != orientation_of(w, h):
+        problems.append(f"{w}x{h} is listed as {matched_orien} but is {orientation_of(w, h)}")
+
+    m = re.match(rf"^.+_{re.escape(fam)}_(\d+)x(\d+)$", _output_stem(path))
+    if m and (int(m.group(1)), int(m.group(2))) != (w, h):
+        problems.append(f"named {m.group(1)}x{m.group(2)} but is {w}x{h}")
+
+    ext = path.suffix.lower()
+    if info["video"]:
+        if ext not in APP_PREVIEW_EXTS:
+            problems.append(f"{ext} is not an App Store preview container ({', '.join(sorted(APP_PREVIEW_EXTS))})")
+        codec = info.get("codec", "")
+        if codec not in APP_PREVIEW_CODECS:
+            problems.append(f"{codec or 'unknown'} video is not accepted for App Store previews (H.264 or ProRes 422 HQ)")
+        elif ext not in APP_PREVIEW_CODECS[codec]:
+            problems.append(f"{codec} previews must use {', '.join(sorted(APP_PREVIEW_CODECS[codec]))}, not {ext}")
+        elif codec == "h264" and info.get("profile") and info["profile"] not in APP_PREVIEW_H264_PROFILES:
+            problems.append(f"H.264 {info['profile']} profile is not accepted (use High or lower)")
+        if info["fps"] > APP_PREVIEW_MAX_FPS + 0.01:
+            problems.append(f"{info['fps']:.2f}fps exceeds {APP_PREVIEW_MAX_FPS:.0f}fps")
+        if info["duration"] < APP_PREVIEW_MIN_DURATION:
+            problems.append(f"{info['duration']:.1f}s is shorter than {APP_PREVIEW_MIN_DURATION:.0f}s")
+        elif info["duration"] > APP_PREVIEW_MAX_DURATION:
+            problems.append(f"{info['duration']:.1f}s is longer than {APP_PREVIEW_MAX_DURATION:.0f}s")
+        if info["bytes"] > APP_PREVIEW_MAX_BYTES:
+            problems.append(f"{info['bytes'] / (1024 * 1024):.1f}MB exceeds {APP_PREVIEW_MAX_BYTES // (1024 * 1024)}MB")
+    else:
+        expected_format = {".png": "PNG", ".jpg": "JPEG", ".jpeg": "JPEG"}.get(ext)
+        if expected_format is None:
+            problems.append(f"{ext} is not an App Store screenshot format (.png, .jpg)")
+        elif info["format"] != expected_format:
+            problems.append(f"extension {ext} but contents are {info['format']}")
+        if info["mode"] in ("RGBA", "LA", "PA") or info["transparency"]:
+            problems.append(f"has an alpha channel ({info['mode']}); App Store screenshots must be opaque")
+    return problems
+
+def validate_output_tree(root, jobs=0):
+    """Validate every media file under root/<family>/<group>/ against the target tables.
+
+    Returns (files_checked, violations, missing) where violations is a list of
+    (path, message) and missing is a list of coverage messages.
+    """
+    import concurrent.futures
+    root = Path(root)
+    entries = []
+    for fp in iter_paths(root):
+        parts = fp.relative_to(root).parts
+        if len(parts) != 3:
+            entries.append((fp, None, None))
+        else:
+            entries.append((fp, parts[0], parts[1]))
+
+    violations = []
+    coverage = {}  # (fam, is_video) -> {group: set(stems)}
+    workers = jobs or min(32, (os.cpu_count() or 1) * 4)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(inspect_output_file, fp): (fp, fam, grp) for (fp, fam, grp) in entries if fam is not None}
+        for (fp, fam, grp) in entries:
+            if fam is None:
+                violations.append((fp, "not in a <family>/<group>/ directory"))
+        for fut in concurrent.futures.as_completed(futures):
+            fp, fam, grp = futures[fut]
+            try:
+                info = fut.result()
+            except Exception as e:
+                violations.append((fp, f"unreadable: {e}"))
+                continue
+            for msg in check_output_file(info, fam, grp):
+                violations.append((fp, msg))
+            if fp.stem.endswith(POSTER_SUFFIX):
+                continue  # posters accompany a video output and are not coverage of their own
+            stem = re.sub(rf"_{re.escape(fam)}_\d+x\d+$", "", fp.stem)
+            coverage.setdefault((fam, info["video"]), {}).setdefault(grp, set()).add(stem)
+
+    missing = []
+    for (fam, is_video), groups in sorted(coverage.items()):
+        kind = "video" if is_video else "screenshot"
+        targets = VIDEO_TARGETS if is_video else TARGETS
+        expected = [g for g, orientations in targets.get(fam, {}).items() if any(orientations.values())]
+        for g in expected:
+            if g not in groups:
+                missing.append(f"{fam}/{g}: no {kind} outputs")
+        all_stems = set().union(*groups.values())
+        for g in expected:
+            if g in groups:
+                for stem in sorted(all_stems - groups[g]):
+                    missing.append(f"{fam}/{g}: missing {kind} for {stem}")
+
+    violations.sort(key=lambda v: str(v[0]))
+    return len(entries), violations, missing
+
+def run_validate(root, jobs=0, require_all_groups=False):
+    """Print violations and coverage gaps; exit status 1 on violations, and on gaps only with require_all_groups.
+
+    Default runs write only the best-matching group per source, so groups
+    without outputs are informational unless every group is expected
+    (--each-group output checked with --require-all-groups).
+    """
+    start = time.perf_counter()
+    checked, violations, missing = validate_output_tree(root, jobs)
+    for (fp, msg) in violations:
+        print(f"✗ {fp}: {msg}")
+    for msg in missing:
+        print(f"Missing: {msg}" if require_all_groups else f"Info: not covered: {msg}")
+    elapsed = time.perf_counter() - start
+    print(f"Validated {checked} files in {elapsed:.2f}s: {len(violations)} violation(s), {len(missing)} coverage gap(s)")
+    return 1 if (violations or (require_all_groups and missing)) else 0
+
+# A tier counts as visually lossless against the LANCZOS reference above these scores
+LOSSLESS_SSIM = 0.99
+LOSSLESS_PSNR_DB = 40.0
+SSIM_BLOCK = 8
+
+def psnr(a, b):
+    """Peak signal-to-noise ratio in dB between two same-size RGB images."""
+    from PIL import ImageChops
+    hist = ImageChops.difference(a, b).histogram()
+    sq = sum(count * (i % 256) ** 2 for i, count in enumerate(hist))
+    mse = sq / (a.width * a.height * len(a.getbands()))
+    if mse == 0:
+        return math.inf
+    return 10 * math.log10(255 ** 2 / mse)
+
+def ssim(a, b):
+    """Mean SSIM on luma over non-overlapping SSIM_BLOCK x SSIM_BLOCK windows.
+
+    Window statistics (and the final mean) come from BOX-downscaling float
+    images, which averages each block exactly, so everything stays in Pillow.
+    """
+    from PIL import Image, ImageMath
+    x = a.convert("L").convert("F")
+    y = b.convert("L").convert("F")
+    bw, bh = x.width // SSIM_BLOCK, x.height // SSIM_BLOCK
+    if bw == 0 or bh == 0:
+        return 1.0 if x.tobytes() == y.tobytes() else 0.0
+    box = (0, 0, bw * SSIM_BLOCK, bh * SSIM_BLOCK)
+    mean = lambda im: im.resize((bw, bh), Image.BOX, box=box)
+    # ImageMath.eval was renamed unsafe_eval in Pillow 10.3; expressions here are constants
+    math_eval = getattr(ImageMath, "unsafe_eval", None) or ImageMath.eval
+    mx, my = mean(x), mean(y)
+    mxx = mean(math_eval("x * x", x=x))
+    myy = mean(math_eval("y * y", y=y))
+    mxy = mean(math_eval("x * y", x=x, y=y))
+    ssim_map = math_eval(
+        "((2 * mx * my + c1) * (2 * (mxy - mx * my) + c2))"
+        " / ((mx * mx + my * my + c1) * ((mxx - mx * mx) + (myy - my * my) + c2))",
+        mx=mx, my=my, mxx=mxx, myy=myy, mxy=mxy, c1=(0.01 * 255) ** 2, c2=(0.03 * 255) ** 2,
+    )
+    return ssim_map.resize((1, 1), Image.BOX).getpixel((0, 0))
+
+def compare_resample_tiers(path, mode, device_hint, allowed_families, smartbar_orientations=None, repeats=3):
+    """Render the best target for path with every tier; return rows of (tier, seconds, ssim, psnr)."""
+    from PIL import Image, ImageOps
+    img = ImageOps.exif_transpose(Image.open(path))
+    img.load()
+    w, h = img.size
+    plan = geometry_plan(w, h, mode, device_hint, allowed_families, smartbar_orientations)
+    job = plan["jobs"][0]
+    tw, th = job["size"]
+    rows = []
+    reference = None
+    # Time cold renders: a warm status bar cache would leave bar rendering out of every repeat but the first
+    cache_bytes, BAR_CACHE.max_bytes = BAR_CACHE.max_bytes, 0
+    try:
+        for tier in RESAMPLE_TIERS:
+            best_time = math.inf
+            for _ in range(repeats):
+                start = time.perf_counter()
+                out = render_plan(img, job, tier)
+                best_time = min(best_time, time.perf_counter() - start)
+            out = out.convert("RGB")
+            if reference is None:
+                reference = out
+            rows.append((tier, best_time, ssim(reference, out), psnr(reference, out)))
+    finally:
+        BAR_CACHE.max_bytes = cache_bytes
+    return (tw, th, plan["family"], job["group"]), rows
+
+def run_compare_resample(paths, mode, device_hint, allowed_families, smartbar_orientations=None):
+    """Print per-tier timing and quality for each image and recommend the cheapest lossless tier."""
+    totals = {tier: [0.0, 1.0, math.inf] for tier in RESAMPLE_TIERS}  # time, worst ssim, worst psnr
+    count = 0
+    for p in paths:
+        if is_video_file(p):
+            continue
+        (tw, th, fam, group), rows = compare_resample_tiers(p, mode, device_hint, allowed_families, smartbar_orientations)
+        count += 1
+        print(f"{p.name} → {fam} {group} {tw}x{th}")
+        for tier, secs, s_val, p_val in rows:
+            print(f"  {tier:<9} {secs * 1000:8.1f} ms   SSIM {s_val:.5f}   PSNR {p_val:6.2f} dB")
+            t = totals[tier]
+            t[0] += secs
+            t[1] = min(t[1], s_val)
+            t[2] = min(t[2], p_val)
+    if count == 0:
+        print("No images to compare.", file=sys.stderr)
+        return 1
+    lossless = [tier for tier, (_, worst_ssim, worst_psnr) in totals.items()
+                if worst_ssim >= LOSSLESS_SSIM and worst_psnr >= LOSSLESS_PSNR_DB]
+    cheapest = min(lossless, key=lambda tier: totals[tier][0])
+    print(f"Compared {count} image(s). Cheapest tier within SSIM >= {LOSSLESS_SSIM} and PSNR >= {LOSSLESS_PSNR_DB:.0f} dB: {cheapest}")
+    return 0
 
 def main():
     ap = argparse.ArgumentParser(
         description="Resize device screenshots and videos to the closest or all allowed sizes by family and model group (cover/contain/stretch/cover_smartbar). Supports per-group output via --each-group."
     )
-    ap.add_argument("input", nargs="+", help="Input file(s) or directory(ies)")
+    ap.add_argument("input", nargs="*", help="Input file(s) or directory(ies)")
     ap.add_argument("-o", "--output", default="resized", help="Output directory (default: ./resized)")
     ap.add_argument("--device", choices=["auto", "ipad", "iphone"], default="auto",
                     help="Force device family or auto-detect by aspect ratio (default: auto)")
@@ -717,9 +1965,29 @@ def main():
                     help="cover: fill target (crop if needed); contain: letterbox; stretch: distort to fit; cover_smartbar: cover but preserve status bar by 2-slice (default: cover)")
     ap.add_argument("--quality", type=int, default=92, help="JPEG quality (default: 92)")
     ap.add_argument("--format", choices=["jpg", "png"], help="Force output format (optional)")
+    ap.add_argument("--resample", choices=list(RESAMPLE_TIERS), default="lanczos",
+                    help="Resampling tier for images and videos: lanczos (best), bicubic (with reducing_gap), bilinear (fastest) (default: lanczos; videos previously used ffmpeg's bicubic default)")
+    ap.add_argument("--compare-resample", action="store_true",
+                    help="Instead of writing outputs, time every --resample tier on the inputs and report SSIM/PSNR against lanczos")
+    ap.add_argument("--band-rows", type=int, default=0, metavar="ROWS",
+                    help="Render PNG outputs in horizontal bands of ROWS rows, writing the file incrementally to cap memory on very large targets (default: 0, off)")
+    ap.add_argument("--workers", type=int, default=0, metavar="N",
+                    help="Render the outputs of each image in N worker processes that read the decoded source from shared memory (default: 0, render in-process)")
+    ap.add_argument("--max-bytes", type=parse_byte_size, default=None, metavar="SIZE",
+                    help="Keep each output under SIZE bytes (e.g. 800K, 8M): images search JPEG quality / PNG compression in memory, videos cap the bitrate")
     ap.add_argument("--video-codec", default="libx264", help="Video codec for output (default: libx264)")
     ap.add_argument("--video-crf", type=int, default=18, help="Video CRF quality 0-51, lower is better (default: 18 for App Store Connect)")
     ap.add_argument("--app-store-optimize", action="store_true", help="Use App Store Connect optimized settings (H.264 High Profile, 30fps max, higher quality)")
+    ap.add_argument("--trim-start", type=float, default=0.0, metavar="SECONDS",
+                    help="Start video outputs this many seconds into the source (default: 0)")
+    ap.add_argument("--trim-length", type=float, default=None, metavar="SECONDS",
+                    help=f"Keep at most SECONDS of video from --trim-start, up to {APP_PREVIEW_MAX_DURATION:.0f}s")
+    ap.add_argument("--fit-duration", action="store_true",
+                    help=f"Fit videos to App Store preview length in the same encode: trim past {APP_PREVIEW_MAX_DURATION:.0f}s and hold the last frame of clips shorter than {APP_PREVIEW_MIN_DURATION:.0f}s")
+    ap.add_argument("--stills", type=parse_still_specs, default=None, metavar="LIST",
+                    help="Also export these video frames as screenshots at the still sizes, from the same decode as the encode: seconds (3, 7.5s) or frame indexes (f120), comma-separated")
+    ap.add_argument("--poster", type=float, default=None, metavar="SECONDS",
+                    help="Also write a PNG poster frame taken SECONDS into each video output, at the video's size")
     ap.add_argument("--families", default="iphone,ipad",
                     help=f"Comma-separated list of families to consider (choices: {','.join(TARGETS.keys())}; default: iphone,ipad)")
     ap.add_argument("--all-sizes", action="store_true",
@@ -740,8 +2008,53 @@ def main():
                     help="Left cap width for 2-slice status bar (pixels)")
     ap.add_argument("--sb-right", type=int, default=200,
                     help="Right cap width for 2-slice status bar (pixels)")
+    ap.add_argument("--include", action="append", default=[], metavar="GLOB",
+                    help="Only process files matching this glob (file name, or relative path if it contains '/'); repeatable")
+    ap.add_argument("--exclude", action="append", default=[], metavar="GLOB",
+                    help="Skip files and directories matching this glob; repeatable")
+    ap.add_argument("--symlinks", choices=["files", "follow", "skip"], default="files",
+                    help="Symlink policy when scanning directories: files (keep symlinked files, don't descend symlinked dirs), follow (descend too), skip (ignore symlinks) (default: files)")
+    ap.add_argument("--bar-cache-mb", type=float, default=64,
+                    help="Memory cap for reusing rendered status bars across the batch, in MB; 0 disables (default: 64)")
+    ap.add_argument("--export-plans", metavar="PATH", default=None,
+                    help="Write the geometry plans (crop boxes, resize sizes, paste offsets, bar heights) computed for each source size as JSON")
+    ap.add_argument("--summary-json", metavar="PATH", default=None,
+                    help="Write a machine-readable run summary (counts and per-job ffmpeg throughput) to PATH")
+    ap.add_argument("--targets-file", metavar="JSON", default=os.environ.get("SMARTBAR_TARGETS"),
+                    help="Load targets/video_targets/status_bar_heights from a JSON data file, compiled to a cached index on first use (default: $SMARTBAR_TARGETS)")
+    ap.add_argument("--dump-targets", metavar="JSON", default=None,
+                    help="Write the active target tables as JSON (a starting point for --targets-file) and exit")
+    ap.add_argument("--validate", metavar="DIR", default=None,
+                    help="Check an output tree (DIR/<family>/<group>/...) against App Store sizes, formats and video limits, reading headers only; exits non-zero on violations")
+    ap.add_argument("--jobs", type=int, default=0,
+                    help="Parallel workers for --validate (default: auto)")
+    ap.add_argument("--require-all-groups", action="store_true",
+                    help="With --validate, fail when any group of a family has no outputs (for --each-group trees); otherwise coverage gaps are informational")
     args = ap.parse_args()
 
+    if args.targets_file:
+        try:
+            use_target_tables(*load_target_tables(args.targets_file))
+        except (OSError, ValueError) as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+    if args.dump_targets:
+        dump_target_tables(args.dump_targets)
+        sys.exit(0)
+
+    if args.validate:
+        sys.exit(run_validate(args.validate, args.jobs, args.require_all_groups))
+    if not args.input:
+        ap.error("the following arguments are required: input")
+    if args.trim_start < 0:
+        ap.error("--trim-start must not be negative")
+    if args.band_rows < 0:
+        ap.error("--band-rows must not be negative")
+    if args.workers < 0:
+        ap.error("--workers must not be negative")
+    if args.trim_length is not None and not 0 < args.trim_length <= APP_PREVIEW_MAX_DURATION:
+        ap.error(f"--trim-length must be between 0 and {APP_PREVIEW_MAX_DURATION:.0f} seconds")
+
     # Store smartbar orientation preference for later use
     smartbar_orientations = set()
     if args.smartbar:
@@ -752,6 +2065,7 @@ def main():
 
     global args_namespace
     args_namespace = args
+    BAR_CACHE.max_bytes = int(args.bar_cache_mb * 1024 * 1024)
 
     selected_families = [f.strip() for f in args.families.split(",") if f.strip()]
     invalid_families = [f for f in selected_families if f not in TARGETS]
@@ -759,36 +2073,65 @@ def main():
         print(f"Error: Invalid families specified: {', '.join(invalid_families)}", file=sys.stderr)
         sys.exit(1)
 
+    if args.compare_resample:
+        sys.exit(run_compare_resample(
+            scan_inputs(args.input, args.include, args.exclude, args.symlinks),
+            args.mode, args.device, selected_families, smartbar_orientations,
+        ))
+
     out_dir = Path(args.output)
     out_dir.mkdir(parents=True, exist_ok=True)
 
+    transport = SharedImageTransport(args.workers) if args.workers > 0 else None
+
     processed = 0
-    for input_path in args.input:
-        for p in iter_paths(input_path):
-            try:
-                if is_video_file(p):
-                    out_path, fam, orien, size = process_video(
-                        p, out_dir, args.mode, args.device, args.quality, args.format, 
-                        allowed_families=selected_families, smartbar_orientations=smartbar_orientations,
-                        video_codec=args.video_codec,
-                        crf=args.video_crf,
-                        app_store_optimize=args.app_store_optimize
-                    )
-                    file_type = "video"
-                else:
-                    out_path, fam, orien, size = process_image(
-                        p, out_dir, args.mode, args.device, args.quality, args.format, 
-                        allowed_families=selected_families, smartbar_orientations=smartbar_orientations
-                    )
-                    file_type = "image"
-                    
-                processed += 1
-                print(f"✓ {p.name} → {out_path.name} ({fam}, {orien}, {size[0]}x{size[1]}) [{file_type}]")
-            except Exception as e:
-                print(f"✗ {p}: {e}", file=sys.stderr)
+    failed = 0
+    run_start = time.perf_counter()
+    for p in scan_inputs(args.input, args.include, args.exclude, args.symlinks):
+        try:
+            if is_video_file(p):
+                out_path, fam, orien, size = process_video(
+                    p, out_dir, args.mode, args.device, args.quality, args.format, 
+                    allowed_families=selected_families, smartbar_orientations=smartbar_orientations,
+                    video_codec=args.video_codec,
+                    crf=args.video_crf,
+                    app_store_optimize=args.app_store_optimize,
+                    max_bytes=args.max_bytes,
+                    trim_start=args.trim_start,
+                    trim_length=args.trim_length,
+                    fit_duration=args.fit_duration,
+                    stills=args.stills,
+                    poster=args.poster,
+                )
+                file_type = "video"
+            else:
+                out_path, fam, orien, size = process_image(
+                    p, out_dir, args.mode, args.device, args.quality, args.format, 
+                    allowed_families=selected_families, smartbar_orientations=smartbar_orientations,
+                    max_bytes=args.max_bytes,
+                    transport=transport,
+                )
+                file_type = "image"
+                
+            processed += 1
+            print(f"✓ {p.name} → {out_path.name} ({fam}, {orien}, {size[0]}x{size[1]}) [{file_type}]")
+        except Exception as e:
+            failed += 1
+            print(f"✗ {p}: {e}", file=sys.stderr)
 
     if processed == 0:
         print("No matching images or videos found.", file=sys.stderr)
 
+    if transport is not None:
+        transport.close()
+        RUN_SUMMARY["shared_memory"] = transport.stats()
+    RUN_SUMMARY["bar_cache"] = BAR_CACHE.stats()
+    RUN_SUMMARY["geometry_plans"] = dict(PLAN_STATS, plans=len(GEOMETRY_PLANS))
+    if args.export_plans:
+        export_geometry_plans(args.export_plans)
+    if args.summary_json:
+        write_run_summary(args.summary_json, processed=processed, failed=failed,
+                          wall_seconds=round(time.perf_counter() - run_start, 3))
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""Test reuse of rendered status bars across a batch"""
+
+import sys
+
+from PIL import Image
+
+sys.path.append('.')
+
+from resize_screenshots import RenderedBarCache, render_two_slice, two_slice_geometry
+
+
+def _strip(color, size=(393, 28)):
+    strip = Image.new("RGB", size, (245, 245, 245))
+    strip.paste(color, (10, 6, 60, 22))  # "clock" differs between captures
+    return strip
+
+
+def _lookup(cache, strip, target_w=640, renders=None):
+    settings = (target_w, 40, 200, 200, "lanczos")
+    geometry = two_slice_geometry(strip.width, strip.height, target_w, 40)
+
+    def render():
+        renders.append(settings)
+        return render_two_slice(strip, geometry, "lanczos")
+    return cache.get_or_render(strip, settings, render)
+
+
+def test_hits_and_misses():
+    """Byte-identical strips hit; different pixels or settings miss"""
+    cache = RenderedBarCache(64 * 1024 * 1024)
+    renders = []
+    first = _lookup(cache, _strip((0, 0, 0)), renders=renders)
+    again = _lookup(cache, _strip((0, 0, 0)), renders=renders)  # a new but byte-identical strip
+    assert again is first and len(renders) == 1
+    other = _lookup(cache, _strip((0, 0, 1)), renders=renders)
+    wide = _lookup(cache, _strip((0, 0, 0)), target_w=960, renders=renders)
+    assert len(renders) == 3
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 3, 3), stats
+    assert stats["bytes"] == sum(bar.width * bar.height * len(bar.getbands()) for bar in (first, other, wide)), stats
+    print("✓ Identical strips reuse the rendered bar, other pixels or sizes render again")
+
+
+def test_lru_eviction():
+    """The least recently used bar is evicted once max_bytes is exceeded"""
+    renders = []
+    a, b, c = _strip((1, 0, 0)), _strip((2, 0, 0)), _strip((3, 0, 0))
+    bar = _lookup(RenderedBarCache(0), a, renders=[])
+    cache = RenderedBarCache(bar.width * bar.height * len(bar.getbands()) * 2)
+    _lookup(cache, a, renders=renders)
+    _lookup(cache, b, renders=renders)
+    _lookup(cache, a, renders=renders)  # a is now most recently used
+    _lookup(cache, c, renders=renders)  # evicts b
+    assert cache.stats()["evictions"] == 1 and cache.bytes <= cache.max_bytes
+    _lookup(cache, a, renders=renders)
+    assert len(renders) == 3
+    _lookup(cache, b, renders=renders)
+    assert len(renders) == 4
+    print("✓ LRU eviction keeps the cache under max_bytes")
+
+
+def test_disabled():
+    """--bar-cache-mb 0 renders every time and stores nothing"""
+    cache = RenderedBarCache(0)
+    renders = []
+    for _ in range(3):
+        _lookup(cache, _strip((0, 0, 0)), renders=renders)
+    stats = cache.stats()
+    assert len(renders) == 3 and (stats["hits"], stats["misses"], stats["entries"]) == (0, 0, 0), stats
+    print("✓ A zero cap bypasses the cache")
+
+
+if __name__ == "__main__":
+    test_hits_and_misses()
+    test_lru_eviction()
+    test_disabled()
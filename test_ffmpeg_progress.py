@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""Test ffmpeg -progress parsing, ETA formatting and stderr tails without ffmpeg"""
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append('.')
+
+from resize_screenshots import FFMPEG_STDERR_TAIL_LINES, _format_eta, run_ffmpeg
+
+
+def _stub(tmp, body):
+    """An executable standing in for ffmpeg; it ignores the -progress arguments run_ffmpeg inserts."""
+    path = Path(tmp) / "ffmpeg"
+    path.write_text(f"#!{sys.executable}\nimport sys\n{body}\n")
+    os.chmod(path, 0o755)
+    return str(path)
+
+
+def _batch(jobs=1, total_media=3.0):
+    return {"jobs": jobs, "index": 1, "total_media": total_media, "done_media": 0.0, "start": time.perf_counter()}
+
+
+def test_format_eta():
+    """Test ETA formatting for unknown, short and long durations"""
+    assert _format_eta(None) == "--:--" and _format_eta(float("inf")) == "--:--"
+    assert _format_eta(75.9) == "01:15"
+    assert _format_eta(3700) == "1h01m"
+    print("✓ ETAs format as mm:ss, or hours and minutes")
+
+
+def test_progress_stats():
+    """Test the -progress stream is parsed into frames, media time and throughput"""
+    with tempfile.TemporaryDirectory() as tmp:
+        stub = _stub(tmp, "\n".join([
+            "for frame, us in ((15, 500000), (45, 1500000), (90, 3000000)):",
+            "    print(f'frame={frame}\\nfps=30.0\\nout_time_us={us}\\nspeed=1x', flush=True)",
+            "    print('progress=' + ('end' if frame == 90 else 'continue'), flush=True)",
+            "print('encoder noise', file=sys.stderr)",
+        ]))
+        with contextlib.redirect_stderr(io.StringIO()) as err:
+            stats = run_ffmpeg([stub, "-i", "in.mov", "out.mp4"], "out.mp4", 3.0, 30.0, _batch(jobs=2, total_media=6.0))
+    assert stats["frames"] == 90 and stats["media_seconds"] == 3.0, stats
+    assert stats["wall_seconds"] > 0 and stats["encode_fps"] > 0 and stats["speed"] > 0, stats
+    print("✓ Frames, media seconds and throughput come from the progress stream")
+
+    lines = err.getvalue().splitlines()
+    assert lines and lines[-1].startswith("  [1/2] out.mp4: frame 90/90"), lines
+    assert "ETA 00:00 (batch " in lines[-1], lines
+    print("✓ Non-terminal runs log the final progress line with job and batch ETA")
+
+
+def test_failure_tail():
+    """Test a failing encode raises with the last stderr lines"""
+    with tempfile.TemporaryDirectory() as tmp:
+        stub = _stub(tmp, "\n".join([
+            "for i in range(30):",
+            "    print(f'stderr line {i}', file=sys.stderr)",
+            "print('progress=end')",
+            "sys.exit(3)",
+        ]))
+        with contextlib.redirect_stderr(io.StringIO()):
+            try:
+                run_ffmpeg([stub, "out.mp4"], "out.mp4", 3.0, 30.0, _batch())
+            except ValueError as e:
+                message = str(e)
+            else:
+                raise AssertionError("non-zero exit was not reported")
+    assert message.startswith("ffmpeg failed (exit 3) for out.mp4:"), message
+    tail = [line.strip() for line in message.splitlines()[1:]]
+    assert tail == [f"stderr line {i}" for i in range(30 - FFMPEG_STDERR_TAIL_LINES, 30)], tail
+    print(f"✓ Failures include the last {FFMPEG_STDERR_TAIL_LINES} stderr lines")
+
+
+if __name__ == "__main__":
+    test_format_eta()
+    test_progress_stats()
+    test_failure_tail()
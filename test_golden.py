@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""Golden-image regression tests for the rendering paths.
+
+Renders the example inputs and synthetic fixtures through every mode and
+smartbar combination and compares them with the stored outputs in
+examples/golden (plus the README outputs in examples/output).  A pixel fails
+when any channel differs by more than TOLERANCE; failing cases write a
+golden | actual | diff strip to golden_diff/.
+
+Regenerate the goldens after an intentional change with:
+    python test_golden.py --update
+"""
+
+import argparse
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from PIL import Image, ImageChops, ImageDraw
+
+sys.path.append('.')
+
+import resize_screenshots
+from resize_screenshots import plan_options, plan_target, process_image, render_plan, write_plan_png_banded
+
+GOLDEN_DIR = Path("examples/golden")
+DIFF_DIR = Path("golden_diff")
+TOLERANCE = 2  # max per-channel difference allowed for any pixel
+ICC_PROFILE = b"\0\0\2\x24appl" + bytes(range(256)) * 2  # opaque stand-in; PNG stores it verbatim
+
+# Smallest App Store size per family/orientation keeps the stored goldens small
+SMALL_TARGETS = {
+    ("iphone", "portrait"): ("iPhone (3.5)", 640, 960),
+    ("iphone", "landscape"): ("iPhone (3.5)", 960, 640),
+    ("ipad", "portrait"): ("iPad (9.7)", 768, 1024),
+    ("ipad", "landscape"): ("iPad (9.7)", 1024, 768),
+}
+
+COMBOS = {
+    "cover": ("cover", None, "cover"),
+    "contain": ("contain", None, "cover"),
+    "stretch": ("stretch", None, "cover"),
+    "smartbar_cover": ("cover", {"portrait", "landscape"}, "cover"),
+    "smartbar_contain": ("cover", {"portrait", "landscape"}, "contain"),
+}
+
+
+def synthetic_screen(w, h, bar_h):
+    """Deterministic screenshot-like fixture: gradient content, UI blocks and a status bar."""
+    gradient = Image.linear_gradient("L").resize((w, h))
+    img = Image.merge("RGB", (gradient, gradient.transpose(Image.FLIP_LEFT_RIGHT), Image.new("L", (w, h), 96)))
+    draw = ImageDraw.Draw(img)
+    draw.rectangle((0, 0, w, bar_h), fill=(245, 245, 245))
+    draw.rectangle((bar_h // 2, bar_h // 4, bar_h * 2, bar_h * 3 // 4), fill=(20, 20, 20))         # clock
+    draw.rectangle((w - bar_h * 3, bar_h // 4, w - bar_h // 2, bar_h * 3 // 4), fill=(20, 20, 20))  # icons
+    for i in range(6):
+        top = bar_h + 20 + i * (h - bar_h) // 7
+        draw.rounded_rectangle((16, top, w - 16, top + (h - bar_h) // 10), radius=12, fill=(255, 255, 255), outline=(0, 0, 0))
+        draw.line((32, top + 10, w - 48, top + (h - bar_h) // 10 - 10), fill=(200, 30, 30), width=3)
+    return img
+
+
+def golden_sources():
+    """(name, image, family) for every source in the matrix."""
+    return [
+        ("example_ipad", Image.open("examples/input/source_ipad_landscape.png"), "ipad"),
+        ("example_iphone", Image.open("examples/input/source_iphone_portrait.png"), "iphone"),
+        ("synthetic_phone", synthetic_screen(393, 852, 28), "iphone"),
+        ("synthetic_tablet", synthetic_screen(1194, 834, 40), "ipad"),
+    ]
+
+
+def golden_jobs():
+    """Yield (case_name, source_image, plan) for the full mode x smartbar matrix."""
+    options = plan_options()
+    for name, img, fam in golden_sources():
+        w, h = img.size
+        orientations = [resize_screenshots.orientation_of(w, h)]
+        if name.startswith("synthetic"):
+            orientations = ["portrait", "landscape"]  # also cover cross-orientation output
+        for orien in orientations:
+            group, tw, th = SMALL_TARGETS[(fam, orien)]
+            for combo, (mode, smartbar, smartbar_mode) in COMBOS.items():
+                job = plan_target(w, h, fam, group, tw, th, mode, smartbar, dict(options, smartbar_mode=smartbar_mode))
+                yield f"{name}_{orien}_{combo}", img, job
+
+
+def golden_cases():
+    """Yield (case_name, rendered_image) for the full mode x smartbar matrix."""
+    for name, img, job in golden_jobs():
+        yield name, render_plan(img, job)
+
+
+def diff_images(expected, actual, tolerance=TOLERANCE):
+    """Return (failing_pixels, max_channel_diff, mask) comparing two images per pixel."""
+    expected = expected.convert("RGB")
+    actual = actual.convert("RGB")
+    if expected.size != actual.size:
+        return expected.width * expected.height, 255, None
+    bands = ImageChops.difference(expected, actual).split()
+    worst = ImageChops.lighter(ImageChops.lighter(bands[0], bands[1]), bands[2])
+    max_diff = worst.getextrema()[1]
+    mask = worst.point(lambda v: 255 if v > tolerance else 0)
+    return mask.histogram()[255], max_diff, mask
+
+
+def write_diff_artifact(name, expected, actual, mask):
+    """Save golden | actual | failing pixels (red) side by side."""
+    DIFF_DIR.mkdir(exist_ok=True)
+    expected = expected.convert("RGB")
+    actual = actual.convert("RGB").resize(expected.size)
+    overlay = expected.convert("L").convert("RGB")
+    if mask is not None:
+        overlay.paste((255, 0, 0), (0, 0), mask)
+    strip = Image.new("RGB", (expected.width * 3, expected.height))
+    for i, im in enumerate((expected, actual, overlay)):
+        strip.paste(im, (i * expected.width, 0))
+    out = DIFF_DIR / f"{name}.png"
+    strip.save(out)
+    return out
+
+
+def check(name, actual, golden_path):
+    expected = Image.open(golden_path)
+    bad, max_diff, mask = diff_images(expected, actual)
+    if bad:
+        out = write_diff_artifact(name, expected, actual, mask)
+        return f"{name}: {bad} pixel(s) over tolerance {TOLERANCE} (max diff {max_diff}), see {out}"
+    return None
+
+
+def test_golden_matrix():
+    """Every mode and smartbar combination matches its stored golden"""
+    failures = []
+    count = 0
+    for name, actual in golden_cases():
+        golden_path = GOLDEN_DIR / f"{name}.png"
+        assert golden_path.exists(), f"Missing golden {golden_path}; run python test_golden.py --update"
+        failure = check(name, actual, golden_path)
+        if failure:
+            failures.append(failure)
+        count += 1
+    assert not failures, "\n".join(failures)
+    print(f"✓ {count} golden renders match")
+
+
+def test_readme_examples():
+    """The README example commands still reproduce examples/output"""
+    cases = [
+        ("examples/input/source_ipad_landscape.png", "ipad", "cover", "ipad/iPad (11)/source_ipad_landscape_ipad_2388x1668.png"),
+        ("examples/input/source_ipad_landscape.png", "ipad", "contain", "ipad/iPad (12.9)/source_ipad_landscape_ipad_2732x2048.png"),
+        ("examples/input/source_iphone_portrait.png", "iphone", "contain", "iphone/iPhone (6.9)/source_iphone_portrait_iphone_1320x2868.png"),
+    ]
+    saved = resize_screenshots.args_namespace
+    failures = []
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            for src, fam, smartbar_mode, rel in cases:
+                resize_screenshots.args_namespace = argparse.Namespace(each_group=True, smartbar_mode=smartbar_mode)
+                out_dir = Path(tmp) / smartbar_mode
+                process_image(Path(src), out_dir, "cover", fam, 92, None, [fam], {"portrait", "landscape"})
+                failure = check(Path(rel).stem, Image.open(out_dir / rel), Path("examples/output") / rel)
+                if failure:
+                    failures.append(failure)
+    finally:
+        resize_screenshots.args_namespace = saved
+    assert not failures, "\n".join(failures)
+    print(f"✓ {len(cases)} README example outputs match")
+
+
+def test_banded_matches_full_render():
+    """Banded PNG output matches the in-memory render for every case, tier and band height, metadata included"""
+    failures = []
+    count = 0
+    icc_kept = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, img, job in golden_jobs():
+            img.info["icc_profile"] = ICC_PROFILE  # iOS screenshots are Display P3 tagged
+            if img.mode == "RGB":
+                img.info["transparency"] = (1, 2, 3)
+            for resample, band_rows in (("lanczos", 7), ("lanczos", 256), ("bicubic", 64), ("bilinear", 33)):
+                out_path = Path(tmp) / f"{name}_{resample}_{band_rows}.png"
+                write_plan_png_banded(img, job, out_path, band_rows, resample)
+                banded = Image.open(out_path)
+                banded.load()
+                full_path = Path(tmp) / "full.png"
+                render_plan(img, job, resample).save(full_path)
+                full = Image.open(full_path)
+                bad, max_diff, mask = diff_images(full, banded)
+                if bad:
+                    failures.append(f"{out_path.stem}: {bad} pixel(s) over tolerance (max diff {max_diff})")
+                for key in ("icc_profile", "transparency"):
+                    if banded.info.get(key) != full.info.get(key):
+                        failures.append(f"{out_path.stem}: {key} is {banded.info.get(key)!r}, full render has {full.info.get(key)!r}")
+                icc_kept += banded.info.get("icc_profile") == ICC_PROFILE
+                count += 1
+    assert not failures, "\n".join(failures)
+    assert icc_kept, "no banded output kept the ICC profile"
+    print(f"✓ {count} banded renders match the full render, {icc_kept} keeping the source ICC profile")
+
+
+def test_banded_failure_removes_output():
+    """A failing banded render raises its own error and leaves no partial PNG"""
+    name, img, job = next(golden_jobs())
+    with tempfile.TemporaryDirectory() as tmp:
+        out_path = Path(tmp) / "partial.png"
+        try:
+            write_plan_png_banded(img, job, out_path, 64, "bogus")
+        except KeyError:
+            pass
+        else:
+            raise AssertionError("unknown resample tier accepted")
+        assert not out_path.exists()
+
+        try:
+            write_plan_png_banded(img, job, out_path, -5, "lanczos")
+        except ValueError as e:
+            assert "rows" in str(e), e
+        else:
+            raise AssertionError("negative band height accepted")
+        assert not out_path.exists()
+
+        for flag in ("--band-rows", "--workers"):
+            result = subprocess.run([sys.executable, "resize_screenshots.py", "examples/input", "-o", tmp, flag, "-5"],
+                                    capture_output=True, text=True)
+            assert result.returncode == 2 and "must not be negative" in result.stderr, (flag, result.stderr)
+    print("✓ Failed banded renders surface the original error and remove the partial file")
+
+
+def update_goldens():
+    GOLDEN_DIR.mkdir(parents=True, exist_ok=True)
+    for name, actual in golden_cases():
+        actual.save(GOLDEN_DIR / f"{name}.png", optimize=True)
+        print(f"Updated {GOLDEN_DIR / name}.png")
+
+
+if __name__ == "__main__":
+    if "--update" in sys.argv:
+        update_goldens()
+    else:
+        test_golden_matrix()
+        test_readme_examples()
+        test_banded_matches_full_render()
+        test_banded_failure_removes_output()
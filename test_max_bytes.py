@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""Test --max-bytes size parsing, in-memory encode search and video bitrate caps"""
+
+import contextlib
+import io
+import sys
+import tempfile
+from pathlib import Path
+
+from PIL import Image
+
+sys.path.append('.')
+
+import resize_screenshots
+from resize_screenshots import (MAX_BYTES_SEARCH_STEPS, encode_within_max_bytes, parse_byte_size, process_video,
+                                video_bitrate_for_max_bytes)
+
+
+def _noisy(size=(320, 480)):
+    return Image.merge("RGB", [Image.effect_noise(size, 64) for _ in range(3)])
+
+
+def _trials(img, ext, quality, max_bytes):
+    """Run encode_within_max_bytes, returning (result, [(settings, size) per trial encode])."""
+    trials = []
+    real_encode = resize_screenshots._encode
+
+    def counting_encode(im, fmt, **kwargs):
+        data = real_encode(im, fmt, **kwargs)
+        trials.append((kwargs, len(data)))
+        return data
+
+    resize_screenshots._encode = counting_encode
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            return encode_within_max_bytes(img, ext, quality, max_bytes, label="test"), trials
+    finally:
+        resize_screenshots._encode = real_encode
+
+
+def test_parse_byte_size():
+    """Test plain, suffixed and invalid sizes"""
+    assert parse_byte_size("500000") == 500000
+    assert parse_byte_size("800K") == 800 * 1024
+    assert parse_byte_size("1.5m") == int(1.5 * 1024 ** 2)
+    assert parse_byte_size("2GiB") == 2 * 1024 ** 3
+    for bad in ("", "abc", "5T", "-1K"):
+        try:
+            parse_byte_size(bad)
+        except Exception:
+            continue
+        raise AssertionError(f"accepted {bad!r}")
+    print("✓ Byte sizes parse with K/M/G suffixes and reject junk")
+
+
+def test_video_bitrate_for_max_bytes():
+    """Test the video bitrate left after container overhead and the audio reserve"""
+    assert video_bitrate_for_max_bytes(10 * 1024 * 1024, 30.0) == int(10 * 1024 * 1024 * 8 * 0.97 / 30 / 1000 - 256)
+    assert video_bitrate_for_max_bytes(10 * 1024 * 1024, 0) is None
+    print("✓ Video bitrate budget accounts for overhead and audio")
+
+
+def test_encode_search():
+    """Test the bounded JPEG quality search, the smallest-encode fallback and low qualities"""
+    img = _noisy()
+    full = len(resize_screenshots._encode(img, "JPEG", quality=92, optimize=True, progressive=True))
+    data, trials = _trials(img, "jpg", 92, full * 2)
+    assert len(trials) == 1 and len(data) == full
+    print("✓ The requested quality is kept when it fits")
+
+    limit = full * 2 // 3
+    data, trials = _trials(img, "jpg", 92, limit)
+    assert len(data) <= limit and len(trials) <= MAX_BYTES_SEARCH_STEPS, (len(data), limit, len(trials))
+    fitting = [kw["quality"] for kw, size in trials if size <= limit]
+    assert Image.open(io.BytesIO(data)).size == img.size and fitting
+    assert len(data) == dict((kw["quality"], size) for kw, size in trials)[max(fitting)]
+    print(f"✓ Binary search fits under the limit in {len(trials)} encodes")
+
+    data, trials = _trials(img, "jpg", 92, 100)
+    assert len(trials) <= MAX_BYTES_SEARCH_STEPS and len(data) == min(size for _, size in trials)
+    print("✓ When nothing fits the smallest encode is returned")
+
+    data, trials = _trials(img, "jpg", 20, 100)
+    assert [kw["quality"] for kw, _ in trials] == [20], trials
+    print("✓ Qualities below MIN_JPEG_QUALITY are tried as-is")
+
+    data, trials = _trials(img, "png", 92, 10 ** 9)
+    assert trials == [({"compress_level": 6, "optimize": False}, len(data))], trials
+    print("✓ PNG keeps the default compression when it fits")
+
+
+def test_video_over_limit_warns():
+    """Test the post-encode check when the output still exceeds --max-bytes"""
+    def fake_ffmpeg(cmd, label, duration, fps, batch):
+        Path(cmd[-1]).write_bytes(b"\0" * 4096)
+        return {}
+
+    saved = resize_screenshots.get_video_info, resize_screenshots.run_ffmpeg
+    resize_screenshots.get_video_info = lambda path: (886, 1920, 30.0, 20.0)
+    resize_screenshots.run_ffmpeg = fake_ffmpeg
+    try:
+        with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stdout(io.StringIO()) as out:
+            src = Path(tmp) / "clip.mov"
+            src.write_bytes(b"")
+            process_video(src, Path(tmp) / "out", "cover", "iphone", 92, None, ["iphone"], max_bytes=1024)
+    finally:
+        resize_screenshots.get_video_info, resize_screenshots.run_ffmpeg = saved
+    assert "clip_iphone_886x1920.mp4 is 4096 bytes, over --max-bytes 1024" in out.getvalue(), out.getvalue()
+    print("✓ Videos still over --max-bytes after encoding are reported")
+
+
+if __name__ == "__main__":
+    test_parse_byte_size()
+    test_video_bitrate_for_max_bytes()
+    test_encode_search()
+    test_video_over_limit_warns()
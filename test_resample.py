@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""Test resampling tiers and the --compare-resample quality metrics"""
+
+import contextlib
+import io
+import math
+import sys
+import tempfile
+from pathlib import Path
+
+from PIL import Image
+
+sys.path.append('.')
+
+from resize_screenshots import BAR_CACHE, compare_resample_tiers, psnr, resize_with_tier, run_compare_resample, ssim
+
+
+def _noisy(size=(240, 320)):
+    return Image.merge("RGB", [Image.effect_noise(size, 64) for _ in range(3)])
+
+
+def test_metrics():
+    """SSIM/PSNR are exact for identical images and a known flat offset"""
+    img = _noisy()
+    assert ssim(img, img.copy()) == 1.0 and psnr(img, img.copy()) == math.inf
+    print("✓ Identical images give SSIM 1 and PSNR inf")
+
+    a = Image.new("RGB", (64, 64), (100, 100, 100))
+    b = Image.new("RGB", (64, 64), (110, 110, 110))
+    assert abs(psnr(a, b) - 10 * math.log10(255 ** 2 / 100)) < 1e-9, psnr(a, b)
+    c1 = (0.01 * 255) ** 2
+    assert abs(ssim(a, b) - (2 * 100 * 110 + c1) / (100 ** 2 + 110 ** 2 + c1)) < 1e-4, ssim(a, b)
+    print("✓ A +10 offset gives the expected PSNR and SSIM")
+
+    blurred = img.resize((120, 160), Image.BOX).resize(img.size, Image.BILINEAR)
+    assert ssim(img, blurred) < 0.9 and psnr(img, blurred) < 30
+    print("✓ Visible degradation lowers both scores")
+
+
+def test_tiers_differ():
+    """bicubic and bilinear produce different outputs from lanczos and each other"""
+    img = _noisy()
+    outputs = {tier: resize_with_tier(img, (150, 200), tier).tobytes() for tier in ("lanczos", "bicubic", "bilinear")}
+    assert len(set(outputs.values())) == 3
+    print("✓ Each tier resamples differently")
+
+
+def test_compare_resample():
+    """--compare-resample reports every tier against lanczos and leaves the bar cache alone"""
+    with tempfile.TemporaryDirectory() as tmp:
+        src = Path(tmp) / "shot.png"
+        Image.open("examples/input/source_iphone_portrait.png").resize((700, 1520)).save(src)
+        before = BAR_CACHE.stats()
+        target, rows = compare_resample_tiers(src, "cover", "iphone", ["iphone"], {"portrait"}, repeats=2)
+        assert [row[0] for row in rows] == ["lanczos", "bicubic", "bilinear"], rows
+        assert rows[0][2] == 1.0 and rows[0][3] == math.inf
+        assert all(0.9 < s_val < 1.0 and 20 < p_val < math.inf for _, _, s_val, p_val in rows[1:]), rows
+        assert BAR_CACHE.stats() == before and BAR_CACHE.max_bytes > 0
+        print("✓ Tiers are compared against lanczos with the bar cache bypassed")
+
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            assert run_compare_resample([src], "cover", "iphone", ["iphone"]) == 0
+        assert "Cheapest tier within" in out.getvalue(), out.getvalue()
+        print("✓ run_compare_resample recommends a tier")
+
+
+if __name__ == "__main__":
+    test_metrics()
+    test_tiers_differ()
+    test_compare_resample()
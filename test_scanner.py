@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""Test the streaming directory scanner"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.append('.')
+
+from resize_screenshots import iter_paths, scan_inputs
+
+
+def _make_tree(root, outside):
+    (outside / "g.png").write_bytes(b"")
+    for rel in ["a.png", "b.JPG", "notes.txt", "sub/c.mov", "sub/d.png", "drafts/e.png", ".hidden/f.png",
+                "exports.png/h.png"]:
+        fp = root / rel
+        fp.parent.mkdir(parents=True, exist_ok=True)
+        fp.write_bytes(b"")
+    os.symlink(root / "a.png", root / "link.png")
+    os.symlink(outside, root / "linked")
+
+
+def _names(paths, root):
+    return sorted(p.relative_to(root).as_posix() for p in paths)
+
+
+def test_scanner_filters():
+    """Test extension filtering, include/exclude globs and symlink policies"""
+    with tempfile.TemporaryDirectory() as tmp, tempfile.TemporaryDirectory() as other:
+        root = Path(tmp)
+        _make_tree(root, Path(other))
+
+        found = _names(iter_paths(root), root)
+        assert found == [".hidden/f.png", "a.png", "b.JPG", "drafts/e.png", "exports.png/h.png", "link.png",
+                         "sub/c.mov", "sub/d.png"], found
+        print("✓ Default scan keeps media files and symlinked files, and descends media-named directories")
+
+        found = _names(iter_paths(root, symlinks="follow"), root)
+        assert "linked/g.png" in found, found
+        print("✓ --symlinks follow descends into symlinked directories")
+
+        found = _names(iter_paths(root, symlinks="skip"), root)
+        assert "link.png" not in found, found
+        print("✓ --symlinks skip ignores symlinks")
+
+        found = _names(iter_paths(root, include=["*.png"], exclude=["drafts", ".*", "exports.png"]), root)
+        assert found == ["a.png", "link.png", "sub/d.png"], found
+        print("✓ Include/exclude globs filter files and prune directories")
+
+        found = _names(iter_paths(root, include=["sub/*"]), root)
+        assert found == ["sub/c.mov", "sub/d.png"], found
+        print("✓ Globs containing '/' match the relative path")
+
+        found = _names(scan_inputs([root / "sub", root / "a.png"]), root)
+        assert found == ["a.png", "sub/c.mov", "sub/d.png"], found
+        print("✓ scan_inputs streams files from every input")
+
+
+if __name__ == "__main__":
+    test_scanner_filters()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""Test the shared-memory hand-off to render worker processes"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+from PIL import Image, ImageChops
+
+sys.path.append('.')
+
+from resize_screenshots import BAR_CACHE, SharedImageTransport, plan_options, plan_target, render_plan
+
+
+def _sources():
+    rgb = Image.open("examples/input/source_iphone_portrait.png").convert("RGB").resize((393, 852))
+    return {
+        "RGB": rgb,
+        "RGBA": rgb.convert("RGBA"),
+        "P": rgb.convert("P", palette=Image.ADAPTIVE),
+        "LA": rgb.convert("LA"),
+    }
+
+
+def test_workers_match_in_process_render():
+    """Outputs rendered from shared memory match in-process renders, and every block is released"""
+    options = plan_options()
+    jobs = [
+        plan_target(393, 852, "iphone", "iPhone (3.5)", 640, 960, "cover", None, options),
+        plan_target(393, 852, "iphone", "iPhone (3.5)", 960, 640, "contain", None, options),
+        plan_target(393, 852, "iphone", "iPhone (3.5)", 640, 960, "cover", {"portrait"}, options),
+    ]
+    transport = SharedImageTransport(2)
+    worker_lookups = 0
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            for mode, img in _sources().items():
+                tasks = [(job, Path(tmp) / f"{mode}_{i}.png", "png", 92, None) for i, job in enumerate(jobs)]
+                before = BAR_CACHE.hits + BAR_CACHE.misses
+                transport.render(img, tasks)
+                worker_lookups += BAR_CACHE.hits + BAR_CACHE.misses - before
+                for job, out_path, *_ in tasks:
+                    expected = render_plan(img, job)
+                    actual = Image.open(out_path)
+                    assert actual.mode == expected.mode, (mode, actual.mode, expected.mode)
+                    assert ImageChops.difference(expected.convert("RGBA"), actual.convert("RGBA")).getbbox() is None, out_path
+            print("✓ RGB, RGBA, P and LA sources render identically in workers")
+    finally:
+        transport.close()
+
+    assert worker_lookups == 4, BAR_CACHE.stats()  # one smartbar output per source
+    print("✓ Status bar cache lookups in workers are counted in the main process")
+
+    stats = transport.stats()
+    assert stats["segments_created"] == stats["segments_released"] == 4 and stats["live_segments"] == 0, stats
+    print("✓ Every shared memory block is released")
+    assert stats["bytes_mapped"] == 3 * (393 * 852 * 4 * 2 + 393 * 852), stats
+    assert stats["bytes_copied"] == 3 * 393 * 852 * 2, stats  # LA cannot be mapped by Pillow
+    print("✓ Byte counters separate mapped and copied sources")
+
+
+if __name__ == "__main__":
+    test_workers_match_in_process_render()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""Test fast startup: lazy imports and the compiled target table index"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.append('.')
+
+import resize_screenshots
+from resize_screenshots import load_target_tables, _target_index_path
+
+
+def test_import_does_not_load_pillow():
+    """Importing the module or printing --help must not import PIL"""
+    code = "import sys, resize_screenshots; print('PIL' in sys.modules)"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, timeout=30)
+    assert result.stdout.strip() == "False", result.stdout + result.stderr
+    print("✓ import resize_screenshots does not import PIL")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        video = Path(tmp) / "clip.mp4"
+        video.write_bytes(b"")
+        # Stand in for ffprobe; inspecting a video output must not need Pillow either
+        code = ("import sys, resize_screenshots as rs; from pathlib import Path; rs.probe_video = lambda p: {}; "
+                f"rs.inspect_output_file(Path({str(video)!r})); print('PIL' in sys.modules)")
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, timeout=30)
+        assert result.stdout.strip() == "False", result.stdout + result.stderr
+    print("✓ Inspecting a video output for --validate does not import PIL")
+
+
+def test_targets_file_index():
+    """Test loading tables from a data file and reusing the compiled index"""
+    saved_cache_home = os.environ.get("XDG_CACHE_HOME")
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            os.environ["XDG_CACHE_HOME"] = tmp
+            data_path = Path(tmp) / "targets.json"
+            data_path.write_text(json.dumps({"targets": {"watch": {"Apple Watch": {"portrait": [[410, 502]]}}}}))
+
+            targets, video_targets, status_bar_heights = load_target_tables(data_path)
+            assert targets == {"watch": {"Apple Watch": {"portrait": [(410, 502)]}}}, targets
+            assert video_targets == resize_screenshots.VIDEO_TARGETS
+            assert status_bar_heights == resize_screenshots.STATUS_BAR_HEIGHTS
+            assert _target_index_path(data_path).exists()
+            print("✓ Data file is parsed, missing tables fall back to built-ins, index is written")
+
+            assert load_target_tables(data_path)[0] == targets
+            print("✓ Index is reused on the next load")
+
+            data_path.write_text(json.dumps({"targets": {"watch": {"Apple Watch": {"portrait": [[416, 496]]}}}}))
+            os.utime(data_path, ns=(0, 1))
+            assert load_target_tables(data_path)[0]["watch"]["Apple Watch"]["portrait"] == [(416, 496)]
+            print("✓ Stale index is rebuilt when the data file changes")
+
+            saved = resize_screenshots.VIDEO_TARGETS
+            resize_screenshots.VIDEO_TARGETS = {"watch": {}}
+            try:
+                assert load_target_tables(data_path)[1] == {"watch": {}}
+            finally:
+                resize_screenshots.VIDEO_TARGETS = saved
+            print("✓ Tables missing from the file come from the running script, not the index")
+
+            for bad in ({"status_bar_heights": [28]}, {"status_bar_heights": {"iphone": 5}},
+                        {"status_bar_heights": {"iphone": {"iPhone (6.9)": "tall"}}}, [1, 2]):
+                data_path.write_text(json.dumps(bad))
+                try:
+                    load_target_tables(data_path)
+                except ValueError:
+                    pass
+                else:
+                    raise AssertionError(f"accepted invalid targets file {bad}")
+            print("✓ Malformed status_bar_heights and top-level values raise ValueError")
+    finally:
+        if saved_cache_home is None:
+            os.environ.pop("XDG_CACHE_HOME", None)
+        else:
+            os.environ["XDG_CACHE_HOME"] = saved_cache_home
+
+
+if __name__ == "__main__":
+    test_import_does_not_load_pillow()
+    test_targets_file_index()
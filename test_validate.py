@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""Test the header-only output tree validator"""
+
+import contextlib
+import io
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from PIL import Image
+
+sys.path.append('.')
+
+from resize_screenshots import check_output_file, run_validate, validate_output_tree
+
+
+def _save(root, rel, size, mode="RGB", fmt=None):
+    fp = root / rel
+    fp.parent.mkdir(parents=True, exist_ok=True)
+    Image.new(mode, size).save(fp, format=fmt)
+
+
+def test_validate_tree():
+    """Test size, orientation, format and coverage checks"""
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        _save(root, "watch/Apple Watch/good_watch_410x502.png", (410, 502))
+        _save(root, "watch/Apple Watch/alpha_watch_410x502.png", (410, 502), mode="RGBA")
+        _save(root, "watch/Apple Watch/wrong_watch_400x500.png", (400, 500))
+        _save(root, "watch/Apple Watch/misnamed_watch_416x496.png", (410, 502))
+        _save(root, "watch/Apple Watch/fake_watch_410x502.jpg", (410, 502), fmt="PNG")
+        _save(root, "iphone/iPhone (3.5)/shot_iphone_640x960.png", (640, 960))
+        _save(root, "stray.png", (10, 10))
+
+        checked, violations, missing = validate_output_tree(root)
+        messages = {(fp.name, msg.split(" ")[0]) for fp, msg in violations}
+        print(f"Checked {checked} files, {len(violations)} violations")
+
+        assert checked == 7, checked
+        assert not any(fp.name == "good_watch_410x502.png" for fp, _ in violations)
+        assert ("alpha_watch_410x502.png", "has") in messages
+        assert ("wrong_watch_400x500.png", "400x500") in messages
+        assert ("misnamed_watch_416x496.png", "named") in messages
+        assert ("fake_watch_410x502.jpg", "extension") in messages
+        assert ("stray.png", "not") in messages
+        print("✓ Size, naming, format and alpha violations are reported")
+
+        assert "iphone/iPhone (6.9): no screenshot outputs" in missing
+        assert not any(m.startswith("watch/") for m in missing), missing
+        print("✓ Missing group coverage is reported per family")
+
+
+def test_default_output_passes():
+    """A default (best group only) run validates cleanly; --require-all-groups makes gaps fail"""
+    with tempfile.TemporaryDirectory() as tmp:
+        out = Path(tmp) / "out"
+        subprocess.run([sys.executable, "resize_screenshots.py", "examples/input", "-o", str(out)],
+                       check=True, capture_output=True)
+        with contextlib.redirect_stdout(io.StringIO()) as log:
+            assert run_validate(out) == 0, log.getvalue()
+        assert "Info: not covered:" in log.getvalue()
+        with contextlib.redirect_stdout(io.StringIO()) as log:
+            assert run_validate(out, require_all_groups=True) == 1
+        assert "Missing: iphone/" in log.getvalue(), log.getvalue()
+    print("✓ Coverage gaps only fail with --require-all-groups")
+
+
+def test_validate_posters():
+    """Poster frames are checked at preview sizes and do not count as screenshot coverage"""
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        _save(root, "iphone/iPhone (6.9)/clip_iphone_886x1920_poster.png", (886, 1920))
+        _save(root, "iphone/iPhone (6.5)/clip_iphone_886x1920_poster.png", (886, 1920))
+        _save(root, "iphone/iPhone (6.5)/bad_iphone_886x1920_poster.png", (1920, 886))
+        _save(root, "iphone/iPhone (6.3)/shot_iphone_1206x2622.png", (1206, 2622))
+
+        checked, violations, missing = validate_output_tree(root)
+        assert [(fp.name, msg.split(" ")[0]) for fp, msg in violations] == [("bad_iphone_886x1920_poster.png", "named")], violations
+        print("✓ Posters are checked against preview sizes and their names")
+
+        assert not any("poster" in m for m in missing), missing
+        assert "iphone/iPhone (6.5): no screenshot outputs" in missing, missing
+        print("✓ Posters are left out of screenshot coverage")
+
+
+def test_validate_video_codecs():
+    """Previews must be H.264 (High profile or lower) or ProRes in .mov"""
+    def problems(name, codec, profile=""):
+        info = {"path": Path(name), "video": True, "width": 886, "height": 1920, "fps": 30.0, "duration": 20.0,
+                "bytes": 1024, "codec": codec, "profile": profile}
+        return check_output_file(info, "iphone", "iPhone (6.9)")
+
+    assert problems("clip_iphone_886x1920.mp4", "h264", "High") == []
+    assert problems("clip_iphone_886x1920.mov", "prores", "HQ") == []
+    assert problems("clip_iphone_886x1920.mp4", "hevc", "Main")[0].startswith("hevc video is not accepted")
+    assert problems("clip_iphone_886x1920.mp4", "vp9")[0].startswith("vp9 video is not accepted")
+    assert problems("clip_iphone_886x1920.mp4", "prores", "HQ")[0].startswith("prores previews must use .mov")
+    assert problems("clip_iphone_886x1920.mp4", "h264", "High 10")[0].startswith("H.264 High 10 profile")
+    print("✓ Preview codecs and H.264 profiles are checked")
+
+
+if __name__ == "__main__":
+    test_validate_tree()
+    test_default_output_passes()
+    test_validate_posters()
+    test_validate_video_codecs()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""Test fitting videos to App Store preview length in the encode pass"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.append('.')
+
+import resize_screenshots
+from resize_screenshots import duration_window, process_video
+
+
+def test_duration_window():
+    """Test trim/pad windows for short, long and explicitly trimmed clips"""
+    assert duration_window(20.0) == (0.0, None, 0.0)
+    assert duration_window(45.0, fit=True) == (0.0, 30.0, 0.0)
+    assert duration_window(9.5, fit=True) == (0.0, None, 5.5)
+    print("✓ --fit-duration trims long clips and pads short ones")
+
+    assert duration_window(45.0, trim_start=10.0, trim_length=20.0) == (10.0, 20.0, 0.0)
+    assert duration_window(45.0, trim_start=40.0, fit=True) == (40.0, None, 10.0)
+    assert duration_window(60.0, trim_length=90.0) == (0.0, 30.0, 0.0)
+    print("✓ Trim windows start at --trim-start and never exceed 30s")
+
+
+def _video_command(duration, **kwargs):
+    """Run process_video on a fake source and return the ffmpeg command it builds."""
+    commands = []
+    saved = resize_screenshots.get_video_info, resize_screenshots.run_ffmpeg
+    resize_screenshots.get_video_info = lambda path: (1920, 886, 60.0, duration)
+    resize_screenshots.run_ffmpeg = lambda cmd, label, dur, fps, batch: commands.append((cmd, dur)) or {}
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            src = Path(tmp) / "clip.mov"
+            src.write_bytes(b"")
+            process_video(src, Path(tmp) / "out", "cover", "iphone", 92, None, ["iphone"], **kwargs)
+    finally:
+        resize_screenshots.get_video_info, resize_screenshots.run_ffmpeg = saved
+    return commands[0]
+
+
+def test_single_pass_command():
+    """Trim, fps limit, scale and pad all land in one ffmpeg command"""
+    cmd, dur = _video_command(45.0, trim_start=5.0, fit_duration=True)
+    assert cmd[cmd.index('-ss') + 1] == '5' and cmd[cmd.index('-t') + 1] == '30', cmd
+    assert cmd.index('-ss') < cmd.index('-i'), cmd
+    assert cmd[cmd.index('-c:a') + 1] == 'aac', cmd
+    assert dur == 30.0
+    print("✓ Long clips are input-seeked and cut with audio re-encoded on the same window")
+
+    cmd, dur = _video_command(8.0, fit_duration=True)
+    vf = cmd[cmd.index('-vf') + 1]
+    assert vf.startswith("fps=30") and vf.endswith("tpad=stop_mode=clone:stop_duration=7.000"), vf
+    assert cmd[cmd.index('-af') + 1] == "apad=whole_dur=15.000", cmd
+    assert '-ss' not in cmd and dur == 15.0
+    print("✓ Short clips hold the last frame and pad audio to 15s in the same filtergraph")
+
+    cmd, dur = _video_command(20.0)
+    assert cmd[cmd.index('-c:a') + 1] == 'copy' and '-af' not in cmd
+    print("✓ Clips left untouched still copy audio")
+
+
+if __name__ == "__main__":
+    test_duration_window()
+    test_single_pass_command()
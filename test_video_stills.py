@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""Test poster frames and stills extracted during the video encode"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+from PIL import Image
+
+sys.path.append('.')
+
+import resize_screenshots
+from resize_screenshots import parse_still_specs, process_video
+
+
+def test_parse_still_specs():
+    """Test parsing timestamps and frame indexes for --stills"""
+    assert parse_still_specs("3, 7.5s,f120") == [("3s", 3.0, None), ("7.5s", 7.5, None), ("f120", None, 120)]
+    try:
+        parse_still_specs("3,frame")
+    except Exception as e:
+        assert "frame" in str(e)
+    else:
+        raise AssertionError("invalid still spec accepted")
+    print("✓ --stills accepts seconds and frame indexes")
+
+
+def test_stills_from_encode():
+    """Stills come from the first encode's decode and go through the image pipeline"""
+    commands = []
+
+    def fake_ffmpeg(cmd, label, duration, fps, batch):
+        # Stand in for ffmpeg: write a source-sized frame for every still but the last (past the end)
+        commands.append(cmd)
+        stills = [cmd[i + 3] for i, arg in enumerate(cmd) if arg.startswith('[s') and cmd[i - 1] == '-map']
+        for i, still in enumerate(stills[:-1]):
+            Image.new("RGB", (1179, 2556), (40 * i, 80, 160)).save(still)
+        return {}
+
+    saved = resize_screenshots.get_video_info, resize_screenshots.run_ffmpeg
+    resize_screenshots.get_video_info = lambda path: (886, 1920, 30.0, 20.0)
+    resize_screenshots.run_ffmpeg = fake_ffmpeg
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            src = Path(tmp) / "clip.mov"
+            src.write_bytes(b"")
+            out_dir = Path(tmp) / "out"
+            resize_screenshots.args_namespace.each_group = True
+            process_video(src, out_dir, "cover", "iphone", 92, None, ["iphone"], {"portrait"},
+                          stills=parse_still_specs("7.5s,f60,2,f600"), poster=5.0)
+
+            graph = commands[0][commands[0].index('-filter_complex') + 1]
+            assert graph.startswith("[0:v]split=5[src][still0][still1][still2][still3];"
+                                    "[still0]select='gte(t,7.5)'[s0];[still1]select='eq(n,60)'[s1];"
+                                    "[still2]select='gte(t,2)'[s2];[still3]select='eq(n,600)'[s3]"), graph
+            assert "[vposter]select='gte(t,5)'[poster]" in graph, graph
+            assert all('[s0]' not in cmd for cmd in commands[1:]) and all('[poster]' in cmd for cmd in commands)
+            print("✓ Stills branch off the first encode, timestamps select on frame time")
+
+            stills = sorted(p.name for p in out_dir.rglob("clip_still_*"))
+            assert {name.split("_iphone_")[0] for name in stills} == {"clip_still_7.5s", "clip_still_f60", "clip_still_2s"}, stills
+            assert any(Image.open(p).size == (1290, 2796) for p in out_dir.rglob("clip_still_2s_*")), stills
+            print("✓ Extracted frames are rendered at screenshot sizes")
+    finally:
+        resize_screenshots.get_video_info, resize_screenshots.run_ffmpeg = saved
+        del resize_screenshots.args_namespace.each_group
+
+
+if __name__ == "__main__":
+    test_parse_still_specs()
+    test_stills_from_encode()